@@ -34,6 +34,12 @@ Database sensor data:
 - Timestamp: {latest.timestamp}
 - Recent readings: {', '.join([f"{s.water_level}m" for s in latest_sensors[:3]])}
 """
+        # Current level of every device, from the device_latest projection
+        per_device = db.query(models.DeviceLatest).order_by(models.DeviceLatest.device_id).all()
+        if per_device:
+            sensor_context += "- Current level per device: " + ", ".join(
+                f"{d.device_id} {d.water_level} ({d.status})" for d in per_device
+            ) + "\n"
         
         # Also try Google Sheets data
         try:
@@ -1,120 +1,399 @@
 # backend/api/sensors.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+import asyncio
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Literal, Optional
+from datetime import datetime, timedelta
+from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from backend import models, schemas
-from backend.database import get_db
-from backend.services.google_sheets_service import GoogleSheetsService
+from backend.database import SessionLocal, get_db
+from backend.services import ingest_service
+from backend.services.ingest_queue import ingest_queue, QueueFullError
+from backend.services.line_listener import line_listener
+from backend.services.replay_filter import replay_filter
+from backend.services.recent_cache import recent_cache
+from backend.services.response_cache import data_version, response_cache
+from backend.services.broadcaster import broadcaster, sse_event
+from backend.services.sync_scheduler import sync_scheduler
+from backend.services import stream_import, binary_protocol, reading_query, stats_service, rollup_service, series_service, fast_json, columnar
 import os
 
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "2000"))
+MAX_IMPORT_ERRORS = int(os.getenv("MAX_IMPORT_ERRORS", "1000"))
+MAX_SERIES_POINTS = int(os.getenv("MAX_SERIES_POINTS", "20000"))
+STREAM_KEEPALIVE_S = float(os.getenv("STREAM_KEEPALIVE_S", "15"))
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
 router = APIRouter(prefix="/sensors", tags=["sensors"])
 
 @router.post("/", response_model=schemas.SensorDataOut, status_code=status.HTTP_201_CREATED)
 def create_sensor(reading: schemas.SensorDataCreate, db: Session = Depends(get_db)):
-    # duplicate check by timestamp + device_id
-    exists = db.query(models.SensorData).filter_by(timestamp=reading.timestamp, device_id=reading.device_id).first()
-    status_val = "normal"
-    warning = float(os.getenv("WARNING_THRESHOLD_CM", "50"))
-    critical = float(os.getenv("CRITICAL_THRESHOLD_CM", "20"))
-    wl = reading.water_level
-    if wl > warning:
-        status_val = "normal"
-    elif wl > critical:
-        status_val = "warning"
-    else:
-        status_val = "critical"
-
-    if exists:
-        exists.water_level = reading.water_level
-        exists.status = status_val
-        exists.location = reading.location or exists.location
-        exists.notes = reading.notes or exists.notes
-        db.add(exists)
-        db.commit()
-        db.refresh(exists)
-        return exists
-
-    obj = models.SensorData(
-        timestamp=reading.timestamp,
-        device_id=reading.device_id,
-        water_level=reading.water_level,
-        location=reading.location or "Default Location",
-        status=status_val,
-        notes=reading.notes
+    # native upsert on the unique (device_id, timestamp) key; no pre-check SELECT
+    return ingest_service.upsert_one(db, reading.model_dump())
+
+@router.post("/batch", response_model=schemas.BatchResultOut)
+def create_sensor_batch(items: List[Dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    """Validate, classify and upsert many readings in one transaction.
+    Invalid items are rejected individually instead of failing the whole batch."""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch too large: {len(items)} items (max {MAX_BATCH_SIZE})",
+        )
+    readings = []
+    errors = []
+    for idx, item in enumerate(items):
+        try:
+            readings.append(schemas.SensorDataCreate.model_validate(item).model_dump())
+        except ValidationError as e:
+            errors.append({"index": idx, "error": _format_validation_error(e)})
+    counts = ingest_service.bulk_upsert(db, readings)
+    return {**counts, "rejected": len(errors), "errors": errors}
+
+@router.post("/binary", response_model=schemas.BatchResultOut)
+async def create_sensor_binary(request: Request, db: Session = Depends(get_db)):
+    """Ingest packed 24-byte records (see backend/services/binary_protocol.py)."""
+    limit = MAX_BATCH_SIZE * binary_protocol.RECORD_SIZE
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Batch too large (max {MAX_BATCH_SIZE} records)",
     )
-    db.add(obj)
-    db.commit()
-    db.refresh(obj)
-    return obj
+    # reject on the declared size, and stop reading once the limit is passed
+    # for chunked bodies, instead of buffering an oversized upload
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    payload = bytes(body)
+    try:
+        readings, errors = binary_protocol.decode_records(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    counts = await run_in_threadpool(ingest_service.bulk_upsert, db, readings)
+    return {**counts, "rejected": len(errors), "errors": errors}
+
+@router.post("/import", response_model=schemas.ImportResultOut)
+async def import_sensors(request: Request, db: Session = Depends(get_db)):
+    """Stream an NDJSON or CSV body (Content-Type application/x-ndjson or text/csv).
+    Lines are validated and bulk-written chunk by chunk, so memory stays flat
+    regardless of upload size."""
+    fmt = stream_import.detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use Content-Type application/x-ndjson or text/csv",
+        )
+    parser = stream_import.RecordParser(fmt)
+    result = {"lines": 0, "inserted": 0, "updated": 0, "replayed": 0, "rejected": 0, "errors": [], "errors_truncated": False}
+    chunk = []
+
+    async def flush():
+        counts = await run_in_threadpool(ingest_service.bulk_upsert, db, chunk)
+        result["inserted"] += counts["inserted"]
+        result["updated"] += counts["updated"]
+        result["replayed"] += counts["replayed"]
+        chunk.clear()
+
+    async for line_no, line in stream_import.iter_lines(request.stream(), stream_import.MAX_LINE_BYTES):
+        result["lines"] = line_no
+        try:
+            if line is None:
+                raise ValueError(f"Line longer than {stream_import.MAX_LINE_BYTES} bytes")
+            record = parser.parse(line)
+            if record is None:
+                continue
+            chunk.append(schemas.SensorDataCreate.model_validate(record).model_dump())
+        except (ValueError, ValidationError) as e:
+            result["rejected"] += 1
+            if len(result["errors"]) < MAX_IMPORT_ERRORS:
+                msg = _format_validation_error(e) if isinstance(e, ValidationError) else str(e)
+                result["errors"].append({"line": line_no, "error": msg})
+            else:
+                result["errors_truncated"] = True
+            continue
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+    return result
+
+@router.post("/ingest", response_model=schemas.IngestAckOut, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_sensor(reading: schemas.SensorDataCreate):
+    """Validate and queue a reading; the write-behind writer group-commits it."""
+    try:
+        depth = ingest_queue.submit(reading.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": 1, "queued": depth}
+
+@router.get("/ingest/stats")
+def ingest_stats():
+    return {
+        **ingest_queue.stats(),
+        "line_protocol": line_listener.stats(),
+        "replay": replay_filter.stats(),
+        "recent_cache": recent_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "stream": broadcaster.stats(),
+    }
+
+def _page_readings(db: Session, limit: int, device_id, start, end, cursor, accept: Optional[str] = None):
+    media_type = columnar.negotiate(accept)
+    columns = columnar.select_columns(db, reading_query.READING_COLUMNS) if media_type else reading_query.READING_COLUMNS
+    try:
+        stmt, mode = reading_query.readings_select(
+            *columns, limit=limit, device_id=device_id, start=start, end=end, cursor=cursor,
+        )
+    except reading_query.InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows = db.execute(stmt).all()
+    cursor_out = reading_query.next_cursor(mode, rows, limit)
+    # the body keeps the documented list schema; the next page is advertised in a header
+    headers = {"X-Next-Cursor": cursor_out} if cursor_out else None
+    if media_type:
+        data = columnar.columns_from_rows(reading_query.READING_COLUMNS, reading_query.READING_FIELDS, rows)
+        return columnar.columnar_response(media_type, data, headers=headers)
+    return fast_json.rows_response(reading_query.READING_FIELDS, rows, headers=headers)
 
 @router.get("/", response_model=List[schemas.SensorDataOut])
-def list_sensors(limit: int = 100, db: Session = Depends(get_db)):
-    items = db.query(models.SensorData).order_by(models.SensorData.id.desc()).limit(limit).all()
-    return items
+def list_sensors(
+    request: Request,
+    limit: int = 100,
+    device_id: Optional[str] = None,
+    start: Optional[schemas.WallTime] = None,
+    end: Optional[schemas.WallTime] = None,
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Readings newest first. Filter by device and time range; follow the
+    X-Next-Cursor response header with ?cursor= for the next page.
+    Send Accept: application/vnd.apache.arrow.stream or application/x-npz
+    for a columnar body instead of JSON."""
+    return response_cache.serve(request, lambda: _page_readings(db, limit, device_id, start, end, cursor, accept))
 
 @router.get("/data", response_model=List[schemas.SensorDataOut])
-def get_sensor_data(limit: int = 100, db: Session = Depends(get_db)):
+def get_sensor_data(
+    request: Request,
+    limit: int = 100,
+    device_id: Optional[str] = None,
+    start: Optional[schemas.WallTime] = None,
+    end: Optional[schemas.WallTime] = None,
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """Alternative endpoint for frontend compatibility"""
-    items = db.query(models.SensorData).order_by(models.SensorData.id.desc()).limit(limit).all()
-    return items
+    return response_cache.serve(request, lambda: _page_readings(db, limit, device_id, start, end, cursor, accept))
+
+@router.get("/recent", response_model=schemas.RecentReadingsOut)
+def get_recent(
+    device_id: str,
+    since: Optional[schemas.WallTime] = None,
+    until: Optional[schemas.WallTime] = None,
+    limit: Optional[int] = 500,
+    db: Session = Depends(get_db),
+):
+    """Recent readings of one device, newest first. Served from the in-memory
+    ring buffer; only windows older than the buffer fall back to the database."""
+    data_version.poll()
+    points = recent_cache.query(device_id, since=since, until=until, limit=limit)
+    if points is not None:
+        return fast_json.FastJSONResponse({"device_id": device_id, "source": "cache", "points": points})
+    SD = models.SensorData
+    q = db.query(SD.timestamp, SD.water_level, SD.status).filter(SD.device_id == device_id)
+    if since is not None:
+        q = q.filter(SD.timestamp >= since)
+    if until is not None:
+        q = q.filter(SD.timestamp <= until)
+    rows = q.order_by(SD.timestamp.desc()).limit(limit).all()
+    return fast_json.FastJSONResponse({
+        "device_id": device_id,
+        "source": "db",
+        "points": [{"timestamp": t, "water_level": wl, "status": st} for t, wl, st in rows],
+    })
+
+@router.get("/stream")
+async def stream_readings(
+    request: Request,
+    device_id: Optional[List[str]] = Query(None),
+):
+    """Server-Sent Events feed: a `snapshot` of the current reading per
+    device, then a `readings` event for every committed write and a `status`
+    event whenever a device changes status. Repeat device_id to subscribe to
+    several devices; omit it for all."""
+    sub = broadcaster.subscribe(device_id)  # before the snapshot, so nothing falls in between
+
+    def snapshot():
+        # own short-lived session: one from get_db would hold a pooled
+        # connection for as long as the client stays subscribed
+        DL = models.DeviceLatest
+        q = select(*[getattr(DL, f) for f in schemas.DeviceLatestOut.model_fields]).order_by(DL.device_id)
+        if device_id:
+            q = q.where(DL.device_id.in_(device_id))
+        db = SessionLocal()
+        try:
+            return [dict(r._mapping) for r in db.execute(q)]
+        finally:
+            db.close()
+
+    try:
+        current = await run_in_threadpool(snapshot)
+    except Exception:
+        broadcaster.unsubscribe(sub)
+        raise
+
+    async def events():
+        try:
+            yield sse_event("snapshot", current)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/latest/all", response_model=List[schemas.DeviceLatestOut])
+def get_latest_all(request: Request, db: Session = Depends(get_db)):
+    """Current reading of every device, read from the device_latest projection."""
+    def build():
+        DL = models.DeviceLatest
+        fields = tuple(schemas.DeviceLatestOut.model_fields)
+        rows = db.execute(select(*[getattr(DL, f) for f in fields]).order_by(DL.device_id)).all()
+        return fast_json.rows_response(fields, rows)
+    return response_cache.serve(request, build)
 
 @router.get("/latest", response_model=schemas.SensorDataOut)
-def get_latest(db: Session = Depends(get_db)):
+def get_latest(request: Request, device_id: Optional[str] = None, db: Session = Depends(get_db)):
+    return response_cache.serve(request, lambda: _latest(db, device_id), model=schemas.SensorDataOut)
+
+def _latest(db: Session, device_id: Optional[str]):
+    if device_id is not None:
+        latest = db.get(models.DeviceLatest, device_id)
+        if not latest:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No sensor data for device {device_id}")
+        return {
+            "id": latest.reading_id,
+            "timestamp": latest.timestamp,
+            "device_id": latest.device_id,
+            "water_level": latest.water_level,
+            "location": latest.location,
+            "status": latest.status,
+            "notes": latest.notes,
+            "created_at": latest.created_at,
+        }
     item = db.query(models.SensorData).order_by(models.SensorData.id.desc()).first()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No sensor data")
     return item
 
 @router.get("/stats", response_model=schemas.StatisticsOut)
-def get_stats(limit: int = 1000, db: Session = Depends(get_db)):
-    items = db.query(models.SensorData).order_by(models.SensorData.id.desc()).limit(limit).all()
-    if not items:
-        return {
-            "total_readings": 0,
-            "average_water_level": 0,
-            "max_water_level": 0,
-            "min_water_level": 0,
-            "devices": []
-        }
-    levels = [i.water_level for i in items]
-    devices = list({i.device_id for i in items})
-    return {
-        "total_readings": len(items),
-        "average_water_level": sum(levels) / len(levels),
-        "max_water_level": max(levels),
-        "min_water_level": min(levels),
-        "devices": devices
-    }
+def get_stats(
+    request: Request,
+    limit: int = 1000,
+    device_id: Optional[str] = None,
+    start: Optional[schemas.WallTime] = None,
+    end: Optional[schemas.WallTime] = None,
+    group_by: Optional[Literal["device", "location"]] = None,
+    granularity: Optional[Literal["minute", "hour", "day"]] = None,
+    db: Session = Depends(get_db),
+):
+    """Aggregates computed in SQL over [start, end] (or the newest `limit` rows
+    when no window is given), optionally broken down per device/location and
+    bucketed by minute/hour/day."""
+    return response_cache.serve(request, lambda: stats_service.compute_stats(
+        db, device_id=device_id, start=start, end=end, limit=limit,
+        group_by=group_by, granularity=granularity,
+    ), model=schemas.StatisticsOut)
 
-@router.post("/sync", status_code=status.HTTP_201_CREATED)
-def sync_from_sheets(limit: int = 500, db: Session = Depends(get_db)):
-    creds = os.getenv("GOOGLE_CREDENTIALS", "config/credentials.json")
-    spreadsheet_id = os.getenv("SPREADSHEET_ID", None)
-    sheet_name = os.getenv("SHEET_NAME", "Sheet1")
-    allowed_device = os.getenv("ALLOWED_DEVICE", "waterlevel")
-    gss = GoogleSheetsService(credentials_file=creds, spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, allowed_device=allowed_device)
-    sheet_items = gss.get_sensor_data(limit=limit)
-
-    inserted = 0
-    updated = 0
-    for row in sheet_items:
-        ts = row.get("timestamp")      # datetime obj
-        device = row.get("device_id")
-        wl = row.get("water_level")
-        status_val = row.get("status")
-        if ts is None or device is None or wl is None:
-            continue
-        # check existing by exact timestamp + device
-        exists = db.query(models.SensorData).filter_by(timestamp=ts, device_id=device).first()
-        if exists:
-            if (exists.water_level != wl) or (exists.status != status_val):
-                exists.water_level = wl
-                exists.status = status_val
-                db.add(exists)
-                updated += 1
-            continue
-        obj = models.SensorData(timestamp=ts, device_id=device, water_level=wl, status=status_val)
-        db.add(obj)
-        inserted += 1
-    db.commit()
-    return {"inserted": inserted, "updated": updated, "total_from_sheet": len(sheet_items)}
+@router.get("/rollups", response_model=schemas.RollupSeriesOut)
+def get_rollups(
+    request: Request,
+    device_id: Optional[str] = None,
+    start: Optional[schemas.WallTime] = None,
+    end: Optional[schemas.WallTime] = None,
+    resolution: Optional[Literal["1m", "1h", "1d"]] = None,
+    step_s: Optional[int] = None,
+    points: int = 500,
+    db: Session = Depends(get_db),
+):
+    """Pre-aggregated per-device buckets. Unless `resolution` is given, the
+    coarsest rollup no wider than `step_s` is used; without a step, one that
+    keeps [start, end] around `points` buckets."""
+    if resolution is None:
+        if step_s is not None:
+            resolution = rollup_service.pick_resolution(timedelta(seconds=max(step_s, 1)))
+        elif start is not None and end is not None and end > start:
+            resolution = rollup_service.pick_resolution((end - start) / max(points, 1))
+        else:
+            resolution = "1h"
+    return response_cache.serve(request, lambda: {
+        "resolution": resolution,
+        "points": rollup_service.query(db, resolution, device_id=device_id, start=start, end=end),
+    }, model=schemas.RollupSeriesOut)
+
+@router.get("/series", response_model=schemas.SeriesOut)
+def get_series(
+    request: Request,
+    device_id: str,
+    start: Optional[schemas.WallTime] = None,
+    end: Optional[schemas.WallTime] = None,
+    points: int = Query(2000, ge=3, le=MAX_SERIES_POINTS),
+    method: Literal["lttb", "minmax"] = "lttb",
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """A chart-ready downsample of one device's readings over [start, end]:
+    Largest-Triangle-Three-Buckets, or the min and max of each time bucket.
+    The lowest and highest readings in range are always kept (LTTB needs
+    points >= 4 for both; with 3 the lowest wins). Columnar
+    bodies (see /sensors/data) carry the metadata in X-Series-* headers."""
+    def build():
+        media_type = columnar.negotiate(accept)
+        if media_type:
+            meta, columns = series_service.downsample_columns(db, device_id, start, end, points, method)
+            headers = {f"X-Series-{k.replace('_', '-').title()}": str(v) for k, v in meta.items()}
+            return columnar.columnar_response(media_type, columns, headers=headers)
+        return series_service.downsample(db, device_id, start=start, end=end, points=points, method=method)
+    return response_cache.serve(request, build, model=schemas.SeriesOut)
+
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED)
+def sync_from_sheets(sheet: Optional[str] = None):
+    """Ask the background scheduler to sync one sheet (all when omitted) now.
+    Syncs of a sheet never overlap, so repeated triggers coalesce; poll
+    GET /sensors/sync for the result."""
+    try:
+        return sync_scheduler.trigger(sheet)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No sheet registered" + (f" as {sheet!r}" if sheet else ""))
+
+@router.get("/sync")
+def sync_status():
+    return sync_scheduler.status()
@@ -0,0 +1,42 @@
+# backend/api/thresholds.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+from sqlalchemy.orm import Session
+from backend import models, schemas
+from backend.database import get_db
+from backend.services import version_counters
+from backend.services.classifier import classifier
+
+router = APIRouter(prefix="/thresholds", tags=["thresholds"])
+
+@router.get("/", response_model=List[schemas.ThresholdProfileOut])
+def list_profiles(db: Session = Depends(get_db)):
+    return db.query(models.ThresholdProfile).order_by(models.ThresholdProfile.id).all()
+
+@router.put("/", response_model=schemas.ThresholdProfileOut)
+def put_profile(profile: schemas.ThresholdProfileIn, db: Session = Depends(get_db)):
+    """Create or replace the profile for a device or a location."""
+    if profile.device_id is not None:
+        obj = db.query(models.ThresholdProfile).filter_by(device_id=profile.device_id).first()
+    else:
+        obj = db.query(models.ThresholdProfile).filter_by(location=profile.location).first()
+    if obj is None:
+        obj = models.ThresholdProfile(device_id=profile.device_id, location=profile.location)
+    obj.warning_cm = profile.warning_cm
+    obj.critical_cm = profile.critical_cm
+    db.add(obj)
+    version_counters.bump(db, version_counters.THRESHOLDS)
+    db.commit()
+    db.refresh(obj)
+    classifier.invalidate()
+    return obj
+
+@router.delete("/{profile_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_profile(profile_id: int, db: Session = Depends(get_db)):
+    obj = db.get(models.ThresholdProfile, profile_id)
+    if not obj:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Threshold profile not found")
+    db.delete(obj)
+    version_counters.bump(db, version_counters.THRESHOLDS)
+    db.commit()
+    classifier.invalidate()
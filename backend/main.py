@@ -1,17 +1,71 @@
 # backend/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.database import engine, Base
-from backend.api import sensors, chat
+from backend.database import engine, Base, SessionLocal
+from backend.migrations import check_dialect, run_migrations
+from backend.api import sensors, chat, thresholds
 import backend.models  # ensure models are imported so SQLAlchemy registers tables
-from backend.models import SensorData, ChatMessage
+from backend.models import SensorData, ChatMessage, ThresholdProfile
+from backend.services.ingest_queue import ingest_queue
+from backend.services.line_listener import line_listener
+from backend.services.recent_cache import recent_cache
+from backend.services.response_cache import data_version
+from backend.services.broadcaster import broadcaster
+from backend.services.sync_scheduler import sync_scheduler, default_sheet
 
 # create tables
+check_dialect(engine)
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
-app = FastAPI(title="GPBL Flood Support API")
+def reload_recent_cache():
+    db = SessionLocal()
+    try:
+        recent_cache.load(db)
+    finally:
+        db.close()
+
+# statuses rewritten by another process (scripts/recompute_status.py)
+data_version.on_external_change(reload_recent_cache)
+
+def load_stream_state():
+    # last status per device, so the first live reading can report a transition
+    db = SessionLocal()
+    try:
+        broadcaster.load(db)
+    finally:
+        db.close()
+
+def start_sheet_sync():
+    # incremental syncs of the configured sheet every SHEET_SYNC_INTERVAL_S
+    sheet = default_sheet()
+    if sheet is not None:
+        sync_scheduler.register(*sheet)
+        sync_scheduler.start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    data_version.poll()  # baseline for rewrites made by other processes
+    reload_recent_cache()
+    load_stream_state()
+    ingest_queue.start()
+    # TCP/UDP line protocol, enabled by LINE_PROTOCOL_TCP_PORT / LINE_PROTOCOL_UDP_PORT
+    await line_listener.start()
+    start_sheet_sync()
+    try:
+        yield
+    finally:
+        sync_scheduler.stop()
+        broadcaster.close()
+        await line_listener.stop()
+        # drain readings that were acknowledged but not yet written
+        ingest_queue.stop()
+
+app = FastAPI(title="GPBL Flood Support API", lifespan=lifespan)
 
 app.include_router(sensors.router)
 app.include_router(chat.router)
+app.include_router(thresholds.router)
 
 @app.get("/")
 def root():
@@ -0,0 +1,85 @@
+# backend/migrations.py
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+SENSOR_KEY_INDEX = "uq_sensor_data_device_ts"
+
+# the ingest and rollup upserts use INSERT ... ON CONFLICT, and the migrations
+# below SQLite/PostgreSQL syntax
+SUPPORTED_DIALECTS = ("sqlite", "postgresql")
+
+
+def check_dialect(engine: Engine):
+    """Refuse to start on a database the write path cannot upsert into."""
+    if engine.dialect.name not in SUPPORTED_DIALECTS:
+        raise RuntimeError(
+            f"DATABASE_URL uses the {engine.dialect.name} dialect; only SQLite and PostgreSQL "
+            "are supported (readings are upserted with INSERT ... ON CONFLICT)"
+        )
+
+
+def _ensure_sensor_key_index(engine: Engine):
+    """Collapse duplicate (device_id, timestamp) rows, keeping the newest id,
+    then add the unique index that the ingest upserts conflict on."""
+    indexes = {ix["name"] for ix in inspect(engine).get_indexes("sensor_data")}
+    if SENSOR_KEY_INDEX in indexes:
+        return
+    with engine.begin() as conn:
+        removed = conn.execute(text(
+            "DELETE FROM sensor_data WHERE id NOT IN ("
+            "SELECT MAX(id) FROM sensor_data GROUP BY device_id, timestamp)"
+        )).rowcount
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {SENSOR_KEY_INDEX} "
+            "ON sensor_data (device_id, timestamp)"
+        ))
+    if removed:
+        print(f"[migrations] Removed {removed} duplicate sensor_data rows")
+
+
+def _backfill_device_latest(engine: Engine):
+    """Seed the device_latest projection from sensor_data when it is empty."""
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM device_latest LIMIT 1")).first():
+            return
+        conn.execute(text(
+            "INSERT INTO device_latest "
+            "(device_id, reading_id, timestamp, water_level, location, status, notes, created_at) "
+            "SELECT s.device_id, s.id, s.timestamp, s.water_level, s.location, s.status, s.notes, s.created_at "
+            "FROM sensor_data s JOIN ("
+            "SELECT device_id, MAX(timestamp) AS ts FROM sensor_data GROUP BY device_id"
+            ") m ON s.device_id = m.device_id AND s.timestamp = m.ts"
+        ))
+
+
+def _backfill_rollups(engine: Engine):
+    """Build reading_rollups from sensor_data the first time the table exists."""
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT 1 FROM reading_rollups LIMIT 1")).first():
+            return
+        if not conn.execute(text("SELECT 1 FROM sensor_data LIMIT 1")).first():
+            return
+    from sqlalchemy.orm import Session
+    from backend.services import rollup_service
+    with Session(engine) as db:
+        written = rollup_service.rebuild(db)
+    print(f"[migrations] Built reading rollups: {written}")
+
+
+def _seed_version_counters(engine: Engine):
+    from backend.services.version_counters import COUNTERS
+    with engine.begin() as conn:
+        for name in COUNTERS:
+            conn.execute(text(
+                "INSERT INTO version_counters (name, value) SELECT :name, 0 "
+                "WHERE NOT EXISTS (SELECT 1 FROM version_counters WHERE name = :name)"
+            ), {"name": name})
+
+
+def run_migrations(engine: Engine):
+    """Bring an existing database up to date; create_all only adds missing tables."""
+    check_dialect(engine)
+    _seed_version_counters(engine)
+    _ensure_sensor_key_index(engine)
+    _backfill_device_latest(engine)
+    _backfill_rollups(engine)
@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, Float, String, DateTime, Text, func
+from sqlalchemy import Column, Integer, Float, String, DateTime, Text, Index, CheckConstraint, UniqueConstraint, func
 from .database import Base
 
 class SensorData(Base):
@@ -13,6 +13,37 @@ class SensorData(Base):
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # one reading per device per timestamp; ingest upserts conflict on this key
+        Index("uq_sensor_data_device_ts", "device_id", "timestamp", unique=True),
+    )
+
+class DeviceLatest(Base):
+    """Newest reading per device, maintained by the ingest path on every write."""
+    __tablename__ = "device_latest"
+    device_id = Column(String(100), primary_key=True)
+    reading_id = Column(Integer, nullable=False)  # sensor_data.id of the reading
+    timestamp = Column(DateTime, nullable=False)
+    water_level = Column(Float, nullable=False)
+    location = Column(String(100), nullable=True)
+    status = Column(String(20), nullable=True)
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+
+class ReadingRollup(Base):
+    """Per-device aggregates of sensor_data over 1-minute, 1-hour and 1-day
+    buckets, kept current by the ingest path (see services/rollup_service.py)."""
+    __tablename__ = "reading_rollups"
+    resolution = Column(String(3), primary_key=True)  # "1m", "1h" or "1d"
+    device_id = Column(String(100), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)  # bucket start
+    reading_count = Column(Integer, nullable=False)
+    level_sum = Column(Float, nullable=False)
+    level_min = Column(Float, nullable=False)
+    level_max = Column(Float, nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)
+    last_level = Column(Float, nullable=False)
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -21,3 +52,42 @@ class ChatMessage(Base):
     timestamp = Column(DateTime, default=func.now())
     session_id = Column(String(100), nullable=True)
     user_id = Column(String(100), nullable=True)
+
+class ThresholdProfile(Base):
+    """Per-device or per-location alert thresholds (distance in cm).
+    A device profile wins over a location profile; otherwise the env defaults apply."""
+    __tablename__ = "threshold_profiles"
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(String(100), nullable=True, unique=True)
+    location = Column(String(100), nullable=True, unique=True)
+    warning_cm = Column(Float, nullable=False)
+    critical_cm = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint("device_id IS NOT NULL OR location IS NOT NULL", name="ck_threshold_profiles_scope"),
+    )
+
+class VersionCounter(Base):
+    """Named counters bumped in the same transaction as the writes they track,
+    so other processes can tell that the data changed."""
+    __tablename__ = "version_counters"
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class SheetSyncState(Base):
+    """Cursor of the incremental Google Sheets sync, one row per worksheet.
+    `checksum` covers the header and the last rows processed; when those no
+    longer match, the sheet was edited and the next sync rescans it."""
+    __tablename__ = "sheet_sync_state"
+    id = Column(Integer, primary_key=True, index=True)
+    spreadsheet_id = Column(String(200), nullable=False)
+    sheet_name = Column(String(200), nullable=False)
+    last_row = Column(Integer, nullable=False, default=1)  # sheet row number last processed; 1 is the header
+    checksum = Column(String(64), nullable=True)
+    full_scans = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("spreadsheet_id", "sheet_name", name="uq_sheet_sync_state_sheet"),
+    )
@@ -1,37 +1,34 @@
 # backend/schemas.py
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional, List
+from pydantic import AfterValidator, BaseModel, Field, model_validator, ConfigDict
+from typing import Annotated, Optional, List
 from datetime import datetime
-from dateutil import parser as _dateutil_parser
+from backend.services.timestamp_parser import default_parser, wall_time
+
+# stored timestamps are naive wall time; readings and query bounds drop any offset
+WallTime = Annotated[datetime, AfterValidator(wall_time)]
 
 # ---------- Input when device/posts new reading ----------
 class SensorDataCreate(BaseModel):
     model_config = ConfigDict(from_attributes=True)  # use attributes from ORM objects
 
-    timestamp: datetime = Field(..., description="Timestamp ISO or common format")
+    timestamp: WallTime = Field(..., description="Timestamp ISO or common format; an offset is dropped, not converted")
     device_id: str = Field(..., description="Device id, e.g. 'waterlevel'")
     water_level: float = Field(..., ge=0, description="Distance in cm from sensor to water")
     location: Optional[str] = None
     notes: Optional[str] = None
 
-    @field_validator("timestamp", mode="before")
+    @model_validator(mode="before")
     @classmethod
-    def _parse_timestamp(cls, v):
-        if isinstance(v, datetime):
-            return v
-        s = str(v).strip()
-        # try common formats quickly
-        fmts = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d")
-        for f in fmts:
-            try:
-                return datetime.strptime(s, f)
-            except Exception:
-                pass
-        # fallback to dateutil
-        try:
-            return _dateutil_parser.parse(s)
-        except Exception:
-            raise ValueError("Unsupported timestamp format")
+    def _parse_timestamp(cls, data):
+        # parse with the format learned for this device; see backend/services/timestamp_parser.py
+        if not isinstance(data, dict) or data.get("timestamp") is None:
+            return data
+        device_id = data.get("device_id")
+        parsed = default_parser.parse(data["timestamp"], key=f"device:{device_id}" if device_id is not None else None)
+        if parsed is None:
+            # leave it to field validation so the error is reported against "timestamp"
+            return data
+        return {**data, "timestamp": parsed}
 
 # ---------- Output returned to clients ----------
 class SensorDataOut(BaseModel):
@@ -46,6 +43,61 @@ class SensorDataOut(BaseModel):
     notes: Optional[str] = None
     created_at: Optional[datetime] = None
 
+# ---------- Latest reading per device ----------
+class DeviceLatestOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    device_id: str
+    reading_id: int
+    timestamp: datetime
+    water_level: float
+    location: Optional[str] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+# ---------- Recent readings window ----------
+class RecentPointOut(BaseModel):
+    timestamp: datetime
+    water_level: float
+    status: Optional[str] = None
+
+class RecentReadingsOut(BaseModel):
+    device_id: str
+    source: str  # "cache" or "db"
+    points: List[RecentPointOut]
+
+# ---------- Batch ingest response ----------
+class BatchRejectOut(BaseModel):
+    index: int
+    error: str
+
+class BatchResultOut(BaseModel):
+    inserted: int
+    updated: int
+    replayed: int = 0
+    rejected: int
+    errors: List[BatchRejectOut] = []
+
+# ---------- Streaming import response ----------
+class ImportErrorOut(BaseModel):
+    line: int
+    error: str
+
+class ImportResultOut(BaseModel):
+    lines: int
+    inserted: int
+    updated: int
+    replayed: int = 0
+    rejected: int
+    errors: List[ImportErrorOut] = []
+    errors_truncated: bool = False
+
+# ---------- Queued ingest acknowledgement ----------
+class IngestAckOut(BaseModel):
+    accepted: int
+    queued: int
+
 # ---------- Stats response ----------
 class StatisticsOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -55,6 +107,68 @@ class StatisticsOut(BaseModel):
     max_water_level: float
     min_water_level: float
     devices: List[str]
+    breakdown: Optional[List["StatsGroupOut"]] = None
+    series: Optional[List["StatsBucketOut"]] = None
+
+class StatsGroupOut(BaseModel):
+    key: Optional[str] = None  # device_id or location
+    count: int
+    average_water_level: float
+    min_water_level: float
+    max_water_level: float
+
+class StatsBucketOut(StatsGroupOut):
+    bucket: datetime
+
+class SeriesPointOut(BaseModel):
+    timestamp: datetime
+    water_level: float
+
+class SeriesOut(BaseModel):
+    device_id: str
+    method: str  # "lttb" or "minmax"
+    source: str  # "raw", or the rollup resolution the points were taken from
+    total_points: int  # points in range before downsampling
+    points: List[SeriesPointOut]
+
+class RollupPointOut(BaseModel):
+    device_id: str
+    bucket: datetime  # bucket start
+    count: int
+    average_water_level: float
+    min_water_level: float
+    max_water_level: float
+    last_timestamp: datetime
+    last_water_level: float
+
+class RollupSeriesOut(BaseModel):
+    resolution: str  # "1m", "1h" or "1d"
+    points: List[RollupPointOut]
+
+# ---------- Threshold profiles ----------
+class ThresholdProfileIn(BaseModel):
+    device_id: Optional[str] = None
+    location: Optional[str] = None
+    warning_cm: float = Field(..., ge=0, description="Distance at or below which status is 'warning'")
+    critical_cm: float = Field(..., ge=0, description="Distance at or below which status is 'critical'")
+
+    @model_validator(mode="after")
+    def _check_scope(self):
+        if (self.device_id is None) == (self.location is None):
+            raise ValueError("Set exactly one of device_id or location")
+        if self.critical_cm > self.warning_cm:
+            raise ValueError("critical_cm must not exceed warning_cm (smaller distance is more critical)")
+        return self
+
+class ThresholdProfileOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    device_id: Optional[str] = None
+    location: Optional[str] = None
+    warning_cm: float
+    critical_cm: float
+    updated_at: Optional[datetime] = None
 
 # ---------- Chat schemas ----------
 class ChatMessageCreate(BaseModel):
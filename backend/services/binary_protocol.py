@@ -0,0 +1,74 @@
+# backend/services/binary_protocol.py
+"""
+Compact binary ingest format for constrained devices.
+
+Each record is 24 bytes, little-endian, no padding:
+
+    device_id    16 bytes  ASCII/UTF-8, NUL-padded
+    timestamp    uint32    seconds since the Unix epoch (UTC); stored as
+                           wall time in DEVICE_TIMEZONE like the epoch
+                           timestamps of every other ingest path
+    distance_cm  float32   distance from sensor to water
+
+A request body is any number of records back to back.
+"""
+import struct
+from typing import Dict, Any, List, Tuple
+import numpy as np
+from backend.services.timestamp_parser import from_epoch_many
+
+DEVICE_ID_SIZE = 16
+RECORD = struct.Struct(f"<{DEVICE_ID_SIZE}sIf")
+RECORD_SIZE = RECORD.size
+# same layout as RECORD, for decoding whole payloads at once
+RECORD_DTYPE = np.dtype([("device_id", f"S{DEVICE_ID_SIZE}"), ("timestamp", "<u4"), ("distance_cm", "<f4")])
+CONTENT_TYPE = "application/x-flood-records"
+
+
+def pack_records(records: List[Tuple[str, int, float]]) -> bytes:
+    """Pack (device_id, epoch_seconds, distance_cm) tuples; used by device firmware tools and tests.
+    Raises ValueError for a device id that does not fit in DEVICE_ID_SIZE bytes."""
+    buf = bytearray(RECORD_SIZE * len(records))
+    for i, (device_id, ts, distance) in enumerate(records):
+        raw_id = device_id.encode("utf-8")
+        if len(raw_id) > DEVICE_ID_SIZE:
+            raise ValueError(f"device_id {device_id!r} is longer than {DEVICE_ID_SIZE} bytes")
+        RECORD.pack_into(buf, i * RECORD_SIZE, raw_id, int(ts), float(distance))
+    return bytes(buf)
+
+
+def decode_records(payload: bytes) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Decode a payload into (readings, errors).
+
+    The payload is viewed in place with numpy.frombuffer and validated as
+    whole columns; readings are ready for ingest_service.bulk_upsert, with
+    timestamps as wall time (timestamp_parser.from_epoch). Errors carry the
+    record index.
+    """
+    if len(payload) % RECORD_SIZE:
+        raise ValueError(f"Payload length {len(payload)} is not a multiple of {RECORD_SIZE}")
+    records = np.frombuffer(payload, dtype=RECORD_DTYPE)
+    distance = records["distance_cm"]
+    bad_distance = ~(np.isfinite(distance) & (distance >= 0))
+    bad_device = records["device_id"] == b""
+
+    errors = [{"index": int(i), "error": "device_id: empty"} for i in np.flatnonzero(bad_device)]
+    errors += [
+        {"index": int(i), "error": "water_level: must be a finite number >= 0"}
+        for i in np.flatnonzero(bad_distance & ~bad_device)
+    ]
+    if errors:
+        errors.sort(key=lambda e: e["index"])
+        records = records[~(bad_device | bad_distance)]
+
+    timestamps = from_epoch_many(records["timestamp"])
+    # float32 on the wire; round away the representation noise
+    levels = np.round(records["distance_cm"].astype(np.float64), 3).tolist()
+    device_ids: Dict[bytes, str] = {}  # device ids repeat heavily; decode each once
+    readings = []
+    for raw_id, ts, level in zip(records["device_id"].tolist(), timestamps, levels):
+        device_id = device_ids.get(raw_id)
+        if device_id is None:
+            device_id = device_ids[raw_id] = raw_id.decode("utf-8", errors="replace")
+        readings.append({"timestamp": ts, "device_id": device_id, "water_level": level})
+    return readings, errors
@@ -0,0 +1,152 @@
+# backend/services/broadcaster.py
+import asyncio
+import datetime
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.services.fast_json import dumps
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One Server-Sent Events frame."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class Subscription:
+    """One connected client: an asyncio queue of encoded frames on its event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, device_ids: Optional[Set[str]], maxsize: int):
+        self.loop = loop
+        self.device_ids = device_ids
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, device_id: str) -> bool:
+        return self.device_ids is None or device_id in self.device_ids
+
+    def _put(self, frames: List[Optional[bytes]]):
+        for frame in frames:
+            try:
+                self.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # a stalled client loses frames rather than holding memory or the writer
+                self.dropped += 1
+
+    def deliver(self, frames: List[Optional[bytes]]) -> bool:
+        """Hand frames to the subscriber's loop; False when that loop is gone."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, frames)
+        except RuntimeError:
+            return False
+        return True
+
+
+class Broadcaster:
+    """In-process fan-out of committed readings to live subscribers.
+
+    The write path calls publish() once per commit, from whatever thread
+    committed. Each event is encoded once per device and the same bytes are
+    handed to every matching subscriber through its loop, so per-client cost
+    is a queue put. Status transitions are detected against the newest
+    status seen per device (seeded from device_latest at startup).
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self._state: Dict[str, Tuple[datetime.datetime, Optional[str]]] = {}
+        self.published = 0
+        self.transitions = 0
+
+    def load(self, db: Session):
+        """Seed the per-device (timestamp, status) state from device_latest."""
+        DL = models.DeviceLatest
+        with self._lock:
+            self._state = {d: (ts, st) for d, ts, st in db.execute(select(DL.device_id, DL.timestamp, DL.status))}
+
+    def subscribe(self, device_ids: Optional[Iterable[str]] = None) -> Subscription:
+        sub = Subscription(asyncio.get_running_loop(), set(device_ids) if device_ids else None, self.queue_size)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def _transitions(self, by_device: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Status changes among readings newer than what each device last
+        reported; late-arriving history does not count as a transition."""
+        events = []
+        with self._lock:
+            for device_id, rows in by_device.items():
+                last_ts, last_status = self._state.get(device_id, (None, None))
+                for r in sorted(rows, key=lambda r: r["timestamp"]):
+                    ts = r["timestamp"]
+                    if last_ts is not None and ts < last_ts:
+                        continue
+                    if last_ts is not None and r.get("status") != last_status:
+                        events.append({
+                            "device_id": device_id,
+                            "from": last_status,
+                            "to": r.get("status"),
+                            "timestamp": ts,
+                            "water_level": r["water_level"],
+                        })
+                    last_ts, last_status = ts, r.get("status")
+                self._state[device_id] = (last_ts, last_status)
+        return events
+
+    def publish(self, rows: List[Dict[str, Any]]):
+        """Fan committed rows (dicts with timestamp, device_id, water_level,
+        status) out as `readings` and `status` events."""
+        by_device: Dict[str, List[Dict[str, Any]]] = {}
+        for r in rows:
+            by_device.setdefault(r["device_id"], []).append(r)
+        transitions = self._transitions(by_device)
+        self.transitions += len(transitions)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        frames: List[Tuple[str, bytes]] = [
+            (device_id, sse_event("readings", {
+                "device_id": device_id,
+                "readings": [
+                    {"timestamp": r["timestamp"], "water_level": r["water_level"], "status": r.get("status")}
+                    for r in device_rows
+                ],
+            }))
+            for device_id, device_rows in by_device.items()
+        ]
+        frames += [(t["device_id"], sse_event("status", t)) for t in transitions]
+        for sub in subscribers:
+            wanted = [frame for device_id, frame in frames if sub.wants(device_id)]
+            if wanted and not sub.deliver(wanted):
+                self.unsubscribe(sub)
+        self.published += len(frames)
+
+    def close(self):
+        """End every open stream (shutdown)."""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for sub in subscribers:
+            sub.deliver([None])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "transitions": self.transitions,
+            "dropped": sum(s.dropped for s in subscribers),
+        }
+
+
+broadcaster = Broadcaster(queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "256")))
@@ -0,0 +1,154 @@
+# backend/services/classifier.py
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple, List
+import numpy as np
+from sqlalchemy import select, func
+from backend.database import SessionLocal
+from backend import models
+from backend.services import version_counters
+
+STATUSES = np.array(["normal", "warning", "critical"])
+
+Thresholds = Tuple[float, float]  # (warning_cm, critical_cm)
+
+
+class StatusClassifier:
+    """In-memory status classifier backed by the threshold_profiles table.
+
+    Profiles are loaded once and kept in dicts, so classifying a reading never
+    hits the database. At most every `reload_interval` seconds a cheap query
+    checks whether the table changed, and the profiles are reloaded if so.
+    The check reads the `thresholds` version counter, which every profile
+    write through the API bumps, plus count/max(updated_at) for edits made
+    behind the API's back.
+    """
+
+    def __init__(self, session_factory=SessionLocal, reload_interval: float = 5.0):
+        self.session_factory = session_factory
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._by_device: Dict[str, Thresholds] = {}
+        self._by_location: Dict[str, Thresholds] = {}
+        self._default: Thresholds = self._env_default()
+        self._signature = None
+        self._checked_at = float("-inf")
+
+    @staticmethod
+    def _env_default() -> Thresholds:
+        return (
+            float(os.getenv("WARNING_THRESHOLD_CM", "50")),
+            float(os.getenv("CRITICAL_THRESHOLD_CM", "20")),
+        )
+
+    @staticmethod
+    def _signature_of(db) -> tuple:
+        return tuple(db.execute(
+            select(
+                version_counters.current(version_counters.THRESHOLDS),
+                func.count(models.ThresholdProfile.id),
+                func.max(models.ThresholdProfile.updated_at),
+            )
+        ).one())
+
+    def reload(self):
+        """Load all profiles now."""
+        db = self.session_factory()
+        try:
+            signature = self._signature_of(db)
+            by_device: Dict[str, Thresholds] = {}
+            by_location: Dict[str, Thresholds] = {}
+            for p in db.scalars(select(models.ThresholdProfile)):
+                if p.device_id:
+                    by_device[p.device_id] = (p.warning_cm, p.critical_cm)
+                elif p.location:
+                    by_location[p.location] = (p.warning_cm, p.critical_cm)
+        finally:
+            db.close()
+        with self._lock:
+            self._by_device, self._by_location = by_device, by_location
+            self._default = self._env_default()
+            self._signature = signature
+            self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        """Reload now (call after committing profile writes)."""
+        self.reload()
+
+    def maybe_reload(self):
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        db = self.session_factory()
+        try:
+            signature = self._signature_of(db)
+        except Exception as e:
+            # table missing or DB unavailable: keep classifying with what we have
+            print(f"[StatusClassifier] Threshold reload check failed: {e}")
+            self._checked_at = time.monotonic()
+            return
+        finally:
+            db.close()
+        if signature != self._signature:
+            self.reload()
+        else:
+            self._checked_at = time.monotonic()
+
+    def thresholds_for(self, device_id: Optional[str] = None, location: Optional[str] = None) -> Thresholds:
+        if device_id is not None and device_id in self._by_device:
+            return self._by_device[device_id]
+        if location is not None and location in self._by_location:
+            return self._by_location[location]
+        return self._default
+
+    def has_device_profile(self, device_id: str) -> bool:
+        return device_id in self._by_device
+
+    def location_profiles(self) -> Dict[str, Thresholds]:
+        return dict(self._by_location)
+
+    def classify(self, water_level: float, device_id: Optional[str] = None, location: Optional[str] = None) -> str:
+        self.maybe_reload()
+        warning, critical = self.thresholds_for(device_id, location)
+        # smaller distance => water is closer to sensor => more critical
+        if water_level > warning:
+            return "normal"
+        elif water_level > critical:
+            return "warning"
+        return "critical"
+
+    def classify_many(
+        self,
+        water_levels: Sequence[float],
+        device_ids: Optional[Sequence[Optional[str]]] = None,
+        locations: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[str]:
+        """Classify a whole column of readings at once.
+
+        Thresholds are resolved once per distinct (device, location) pair and
+        the comparison runs vectorized over the column.
+        """
+        self.maybe_reload()
+        levels = np.asarray(water_levels, dtype=np.float64)
+        n = len(levels)
+        if n == 0:
+            return []
+        device_ids = device_ids if device_ids is not None else [None] * n
+        locations = locations if locations is not None else [None] * n
+        if not self._by_device and not self._by_location:
+            warning, critical = self._default
+        else:
+            resolved: Dict[Tuple[Optional[str], Optional[str]], Thresholds] = {}
+            pairs = []
+            for key in zip(device_ids, locations):
+                t = resolved.get(key)
+                if t is None:
+                    t = resolved[key] = self.thresholds_for(*key)
+                pairs.append(t)
+            bounds = np.array(pairs, dtype=np.float64)
+            warning, critical = bounds[:, 0], bounds[:, 1]
+        codes = np.where(levels > warning, 0, np.where(levels > critical, 1, 2))
+        return STATUSES[codes].tolist()
+
+
+classifier = StatusClassifier(reload_interval=float(os.getenv("THRESHOLD_RELOAD_S", "5")))
@@ -0,0 +1,44 @@
+# backend/services/fast_json.py
+import datetime
+import json
+from typing import Any, Dict, Iterable, Optional, Sequence
+from fastapi import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain dicts/lists/scalars; orjson when installed, else the stdlib."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response for content that is already plain data. Returning it from
+    a route skips response_model validation and jsonable_encoder, so the
+    route's response_model only documents the shape."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_response(
+    fields: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    headers: Optional[Dict[str, str]] = None,
+) -> FastJSONResponse:
+    """Encode Core result tuples as a JSON list of objects keyed by `fields`."""
+    return FastJSONResponse([dict(zip(fields, row)) for row in rows], headers=headers)
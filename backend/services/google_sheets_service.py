@@ -1,26 +1,100 @@
 # backend/services/google_sheets_service.py
 import gspread
+from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
-import datetime
-
-def _try_parse_ts(ts_str: str) -> Optional[datetime.datetime]:
-    if not ts_str:
-        return None
-    s = str(ts_str).strip()
-    fmts = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d")
-    for f in fmts:
-        try:
-            return datetime.datetime.strptime(s, f)
-        except Exception:
-            pass
-    # fallback to dateutil if available
+import threading
+from operator import itemgetter
+import numpy as np
+from backend.services.timestamp_parser import default_parser
+from backend.services.classifier import classifier
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+def _float_column(values: List[str]) -> np.ndarray:
+    """Strings -> float64, NaN where a value is empty or not a number."""
     try:
-        from dateutil import parser as _p
-        return _p.parse(s)
-    except Exception:
-        return None
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        pass
+    out = np.full(len(values), np.nan)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(v)
+        except ValueError:
+            continue
+    return out
+
+
+def parse_columns(
+    header: List[str],
+    rows: List[List[str]],
+    allowed_device: Optional[str] = None,
+    timestamp_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Sheet rows -> column batches: timestamp and device_id/status lists
+    plus a float64 water_level array, all the same length.
+
+    The header is resolved once and each column is parsed in bulk; rows
+    without a timestamp or distance, or from another device than
+    `allowed_device`, are dropped, and status is classified per device.
+    """
+    hdr_map = {h.strip().lower(): i for i, h in enumerate(header)}
+    if not all(k in hdr_map for k in ("timestamp", "device_id", "distance_cm")):
+        rows = []
+
+    def column(name: str) -> List[str]:
+        i = hdr_map[name]
+        try:
+            values = list(map(itemgetter(i), rows))
+        except IndexError:
+            # the API trims trailing empty cells, so some rows are short
+            values = [r[i] if len(r) > i else "" for r in rows]
+        return list(map(str.strip, values))
+
+    devices = column("device_id") if rows else []
+    keep = np.ones(len(devices), dtype=bool)
+    if allowed_device and devices:
+        allowed = allowed_device.lower()
+        keep = np.fromiter(map(allowed.__eq__, map(str.lower, devices)), dtype=bool, count=len(devices))
+    if not keep.all():
+        rows = [r for r, k in zip(rows, keep) if k]
+        devices = [d for d, k in zip(devices, keep) if k]
+
+    levels = _float_column(column("distance_cm")) if rows else np.empty(0)
+    stamps = default_parser.parse_many(column("timestamp"), key=timestamp_key) if rows else []
+    keep = ~np.isnan(levels) & np.fromiter((t is not None for t in stamps), dtype=bool, count=len(stamps))
+    if not keep.all():
+        idx = np.flatnonzero(keep).tolist()
+        stamps = [stamps[i] for i in idx]
+        devices = [devices[i] for i in idx]
+        levels = levels[keep]
+    # smaller distance => more critical, thresholds per device profile
+    return {
+        "timestamp": stamps,
+        "device_id": devices,
+        "water_level": levels,
+        "status": classifier.classify_many(levels, devices),
+    }
+
+
+def parse_rows(
+    header: List[str],
+    rows: List[List[str]],
+    allowed_device: Optional[str] = None,
+    timestamp_key: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """parse_columns() as one reading dict per row, the shape diff_readings
+    and write_rows take (executemany binds one dict per row anyway)."""
+    cols = parse_columns(header, rows, allowed_device, timestamp_key)
+    return [
+        {"timestamp": ts, "device_id": d, "water_level": w, "status": st}
+        for ts, d, w, st in zip(cols["timestamp"], cols["device_id"], cols["water_level"].tolist(), cols["status"])
+    ]
 
 class GoogleSheetsService:
     def __init__(
@@ -36,17 +110,13 @@ class GoogleSheetsService:
         self.allowed_device = allowed_device
         self.client = None
         self.spreadsheet = None
+        self._worksheet = None
+        # learned-format key for this sheet's timestamp column
+        self._timestamp_key = f"sheet:{self.spreadsheet_id}:{self.sheet_name}:timestamp"
         self._authenticate()
 
     def _authenticate(self):
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        if not os.path.exists(self.credentials_file):
-            raise FileNotFoundError(f"Credentials file not found: {self.credentials_file}")
-        credentials = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_file, scope)
-        self.client = gspread.authorize(credentials)
+        self.client = sheets_registry.client(self.credentials_file)
         if self.spreadsheet_id:
             self.spreadsheet = self.client.open_by_key(self.spreadsheet_id)
         else:
@@ -59,56 +129,43 @@ class GoogleSheetsService:
                 except Exception:
                     self.spreadsheet = None
 
-    def _parse_row_using_header(self, header: List[str], row: List[str]) -> Optional[Dict[str, Any]]:
-        hdr_map = {h.strip().lower(): i for i, h in enumerate(header)}
-        expected = ["timestamp", "device_id", "distance_cm"]
-        if not all(k in hdr_map for k in expected):
-            return None
-        try:
-            ts_raw = row[hdr_map["timestamp"]] if len(row) > hdr_map["timestamp"] else ""
-            device_raw = row[hdr_map["device_id"]] if len(row) > hdr_map["device_id"] else ""
-            dist_raw = row[hdr_map["distance_cm"]] if len(row) > hdr_map["distance_cm"] else ""
-
-            ts = _try_parse_ts(ts_raw)
-            device = device_raw.strip()
-            try:
-                distance_cm = float(dist_raw) if str(dist_raw).strip() != "" else None
-            except Exception:
-                return None
-
-            return {"timestamp": ts, "device_id": device, "water_level": distance_cm}
-        except Exception:
-            return None
+    @property
+    def sheet_key(self) -> Optional[str]:
+        """Spreadsheet id, also when the spreadsheet was opened by name."""
+        return self.spreadsheet_id or (self.spreadsheet.id if self.spreadsheet else None)
+
+    @property
+    def timestamp_key(self) -> str:
+        return self._timestamp_key
+
+    def worksheet(self):
+        if not self.spreadsheet:
+            raise RuntimeError("No spreadsheet opened. Check SPREADSHEET_ID or permissions.")
+        if self._worksheet is None:
+            self._worksheet = self.spreadsheet.worksheet(self.sheet_name)
+        return self._worksheet
+
+    def read_header(self) -> List[str]:
+        return self.worksheet().row_values(1)
+
+    def read_rows(self, first_row: int, count: int, width: int) -> List[List[str]]:
+        """Rows first_row .. first_row + count - 1 (1-based sheet rows) of the
+        first `width` columns, as one A1 range request. Trailing empty rows
+        are not returned, so a short result means the end of the data."""
+        last = rowcol_to_a1(first_row + count - 1, max(width, 1))
+        return [list(r) for r in self.worksheet().get(f"A{first_row}:{last}")]
 
     def get_sensor_data(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The newest `limit` rows of the sheet (all rows when limit is falsy).
+        Downloads the whole worksheet; syncing uses sheet_sync instead."""
         try:
-            if not self.spreadsheet:
-                raise RuntimeError("No spreadsheet opened. Check SPREADSHEET_ID or permissions.")
-
-            worksheet = self.spreadsheet.worksheet(self.sheet_name)
-            all_values = worksheet.get_all_values()
+            all_values = self.worksheet().get_all_values()
             if not all_values or len(all_values) < 2:
                 return []
 
             header = all_values[0]
-            rows = all_values[1:limit+1] if limit else all_values[1:]
-
-            sensor_data = []
-            for r in rows:
-                parsed = self._parse_row_using_header(header, r)
-                if not parsed:
-                    continue
-                # require parsed timestamp and water_level
-                if parsed["timestamp"] is None or parsed["water_level"] is None:
-                    continue
-                if self.allowed_device:
-                    if parsed["device_id"].lower() != self.allowed_device.lower():
-                        continue
-                # compute status with thresholds (distance small -> critical)
-                parsed["status"] = self._get_status(parsed["water_level"])
-                sensor_data.append(parsed)
-
-            return sensor_data
+            rows = all_values[1:][-limit:] if limit else all_values[1:]
+            return parse_rows(header, rows, self.allowed_device, self._timestamp_key)
         except Exception as e:
             print(f"[GoogleSheetsService] Failed to get sensor data: {e}")
             return []
@@ -121,13 +178,81 @@ class GoogleSheetsService:
             print(f"Failed to get latest sensor data: {str(e)}")
             return None
 
-    def _get_status(self, water_level: float) -> str:
-        warning_threshold = float(os.getenv("WARNING_THRESHOLD_CM", "50"))
-        critical_threshold = float(os.getenv("CRITICAL_THRESHOLD_CM", "20"))
-        # smaller distance => water is closer to sensor => more critical
-        if water_level > warning_threshold:
-            return "normal"
-        elif water_level > critical_threshold:
-            return "warning"
-        else:
-            return "critical"
+
+class SheetsRegistry:
+    """Process-wide cache of authorized clients and opened sheets.
+
+    Authorizing re-reads the key file and opening a spreadsheet is an API
+    round trip, so both are done once per process instead of per request.
+    Clients are keyed by credentials file and re-authorized when the file
+    changes; services (which hold their opened spreadsheet and worksheet)
+    by credentials, spreadsheet, sheet and device filter. The client's
+    AuthorizedSession refreshes the access token itself once it expires, so
+    cached entries stay usable. Lookups are thread-safe; discard() a service
+    after an API error to reopen it on next use.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clients: Dict[str, Tuple[float, gspread.Client]] = {}
+        self._services: Dict[Tuple[str, Optional[str], str, Optional[str]], GoogleSheetsService] = {}
+        self.authorizations = 0
+
+    def client(self, credentials_file: str) -> gspread.Client:
+        path = os.path.abspath(credentials_file)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Credentials file not found: {credentials_file}")
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._clients.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            credentials = ServiceAccountCredentials.from_json_keyfile_name(path, SCOPE)
+            client = gspread.authorize(credentials)
+            self._clients[path] = (mtime, client)
+            self.authorizations += 1
+            return client
+
+    def service(
+        self,
+        credentials_file: str = "config/credentials.json",
+        spreadsheet_id: Optional[str] = None,
+        sheet_name: Optional[str] = None,
+        allowed_device: Optional[str] = "waterlevel",
+    ) -> GoogleSheetsService:
+        """Shared GoogleSheetsService; arguments default like the constructor's."""
+        key = (
+            os.path.abspath(credentials_file),
+            spreadsheet_id or os.getenv("SPREADSHEET_ID"),
+            sheet_name or os.getenv("SHEET_NAME", "Sheet1"),
+            allowed_device,
+        )
+        with self._lock:
+            service = self._services.get(key)
+            # a changed key file means a new client; reopen with it
+            if service is None or service.client is not self.client(credentials_file):
+                service = GoogleSheetsService(
+                    credentials_file=credentials_file,
+                    spreadsheet_id=key[1],
+                    sheet_name=key[2],
+                    allowed_device=allowed_device,
+                )
+                self._services[key] = service
+            return service
+
+    def discard(self, service: GoogleSheetsService):
+        with self._lock:
+            for key, cached in list(self._services.items()):
+                if cached is service:
+                    del self._services[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "services": len(self._services),
+                "authorizations": self.authorizations,
+            }
+
+
+sheets_registry = SheetsRegistry()
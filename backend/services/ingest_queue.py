@@ -0,0 +1,154 @@
+# backend/services/ingest_queue.py
+import os
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from backend.database import SessionLocal
+from backend.services import ingest_service
+
+
+class QueueFullError(Exception):
+    """Raised when the ingest queue cannot accept more readings."""
+
+
+class IngestQueue:
+    """Write-behind ingest pipeline.
+
+    Readings are acknowledged as soon as they are queued; a single writer thread
+    drains the bounded queue and group-commits them through
+    ingest_service.bulk_upsert, flushing when either `batch_size` readings are
+    pending or `max_wait` seconds have passed since the first one arrived.
+    A batch that fails to write (e.g. database locked) is retried
+    `max_retries` times with exponential backoff before it is dropped and
+    logged.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        batch_size: int = 500,
+        max_wait: float = 0.2,
+        max_retries: int = 5,
+        retry_delay: float = 0.1,
+        session_factory=SessionLocal,
+    ):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, reading: Dict[str, Any]) -> int:
+        """Queue one validated reading; returns the queue depth after insertion."""
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait(reading)
+        except queue.Full:
+            raise QueueFullError("Ingest queue is full")
+        return self._queue.qsize()
+
+    def submit_many(self, readings: List[Dict[str, Any]]) -> int:
+        """Queue as many readings as fit; returns how many were accepted."""
+        if not self.running:
+            self.start()
+        for accepted, reading in enumerate(readings):
+            try:
+                self._queue.put_nowait(reading)
+            except queue.Full:
+                return accepted
+        return len(readings)
+
+    def stop(self, timeout: float = 30.0):
+        """Stop accepting work and flush everything still queued."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+        }
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        try:
+            first = self._queue.get(timeout=self.max_wait)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        # readings were acknowledged with 202, so a failed write is retried
+        # (locked database, I/O error) rather than dropped on the first error
+        for attempt in range(self.max_retries + 1):
+            db = self.session_factory()
+            try:
+                ingest_service.bulk_upsert(db, batch)
+                self.written += len(batch)
+                break
+            except Exception as e:
+                db.rollback()
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    lost = ", ".join(f"{r.get('device_id')}@{r.get('timestamp')}" for r in batch)
+                    print(f"[IngestQueue] Dropped batch of {len(batch)} after {attempt + 1} attempts: {e}; lost readings: {lost}")
+                    break
+                self.retries += 1
+                delay = self.retry_delay * 2 ** attempt
+                print(f"[IngestQueue] Failed to write batch of {len(batch)} (retry in {delay:.1f}s): {e}")
+            finally:
+                db.close()
+            time.sleep(delay)
+        self.batches += 1
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+
+ingest_queue = IngestQueue(
+    maxsize=int(os.getenv("INGEST_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("INGEST_BATCH_SIZE", "500")),
+    max_wait=float(os.getenv("INGEST_MAX_WAIT_S", "0.2")),
+    max_retries=int(os.getenv("INGEST_MAX_RETRIES", "5")),
+)
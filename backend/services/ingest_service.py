@@ -0,0 +1,218 @@
+# backend/services/ingest_service.py
+import os
+from itertools import groupby
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import bindparam, select, tuple_
+from sqlalchemy.orm import Session
+from backend import models
+from backend.services import rollup_service, version_counters
+from backend.services.broadcaster import broadcaster
+from backend.services.classifier import classifier
+from backend.services.replay_filter import replay_filter
+from backend.services.recent_cache import recent_cache
+from backend.services.response_cache import data_version
+
+# keys per set-based statement; keeps (device_id, timestamp) pairs under SQLite's bind limit
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "400"))
+
+# columns copied from sensor_data into the device_latest projection
+LATEST_COLUMNS = ("device_id", "timestamp", "water_level", "location", "status", "notes", "created_at")
+
+# columns of the unique (device_id, timestamp) key the upsert conflicts on
+CONFLICT_KEYS = ("device_id", "timestamp")
+# optional columns: when absent the insert falls back to the column default
+# and an update keeps whatever the existing row already holds
+OPTIONAL_COLUMNS = ("location", "notes")
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        # backend.migrations.check_dialect stops the app before it gets here
+        raise NotImplementedError(f"Upsert not supported for dialect: {dialect}")
+    return insert
+
+
+def upsert_statement(db: Session, columns: Tuple[str, ...]):
+    """INSERT ... ON CONFLICT (device_id, timestamp) DO UPDATE for the given columns."""
+    insert = _dialect_insert(db)
+    stmt = insert(models.SensorData)
+    return stmt.on_conflict_do_update(
+        index_elements=list(CONFLICT_KEYS),
+        set_={c: stmt.excluded[c] for c in columns if c not in CONFLICT_KEYS},
+    )
+
+
+def refresh_latest(db: Session, keys: List[Tuple[str, Any]]):
+    """Point device_latest at the given (device_id, timestamp) readings, but only
+    where they are at least as new as what the projection already holds.
+    Runs inside the caller's transaction."""
+    if not keys:
+        return
+    SD = models.SensorData
+    DL = models.DeviceLatest.__table__  # Core insert: the ORM bulk path cannot take INSERT ... SELECT
+    newest: Dict[str, Any] = {}
+    for device_id, ts in keys:
+        if device_id not in newest or ts > newest[device_id]:
+            newest[device_id] = ts
+    source = select(SD.id, *[getattr(SD, c) for c in LATEST_COLUMNS]).where(
+        SD.device_id == bindparam("latest_device_id"),
+        SD.timestamp == bindparam("latest_timestamp"),
+    )
+    stmt = _dialect_insert(db)(DL).from_select(["reading_id", *LATEST_COLUMNS], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DL.c.device_id],
+        set_={c: stmt.excluded[c] for c in ("reading_id", *LATEST_COLUMNS) if c != "device_id"},
+        where=stmt.excluded.timestamp >= DL.c.timestamp,
+    )
+    db.execute(stmt, [{"latest_device_id": d, "latest_timestamp": ts} for d, ts in newest.items()])
+
+
+def _after_commit(readings: List[Dict[str, Any]], rows: List[Dict[str, Any]], row_ids: Optional[List[Optional[int]]] = None):
+    """Update the in-process indexes once a write is durable."""
+    replay_filter.remember(readings, row_ids)
+    recent_cache.record(rows)
+    data_version.bump()
+    broadcaster.publish(rows)
+
+
+def _to_row(reading: Dict[str, Any], status_val: str) -> Dict[str, Any]:
+    row = {
+        "timestamp": reading["timestamp"],
+        "device_id": reading["device_id"],
+        "water_level": reading["water_level"],
+        "status": reading.get("status") or status_val,
+    }
+    for c in OPTIONAL_COLUMNS:
+        if reading.get(c):
+            row[c] = reading[c]
+    return row
+
+
+def _classify_rows(readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    statuses = classifier.classify_many(
+        [r["water_level"] for r in readings],
+        [r["device_id"] for r in readings],
+        [r.get("location") for r in readings],
+    )
+    return [_to_row(r, s) for r, s in zip(readings, statuses)]
+
+
+def _dedupe(readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse readings sharing (device_id, timestamp); the last one in the batch wins."""
+    by_key: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+    for r in readings:
+        by_key[(r["device_id"], r["timestamp"])] = r
+    return list(by_key.values())
+
+
+def upsert_one(db: Session, reading: Dict[str, Any]) -> models.SensorData:
+    """Upsert a single reading with one statement and return the stored row.
+    An exact replay of a recent reading is answered by primary key without writing."""
+    row_id = replay_filter.replay_id(reading)
+    obj = db.get(models.SensorData, row_id) if row_id is not None else None
+    # only a skipped write is a hit; without a stored row the reading is written
+    replay_filter.count(hit=obj is not None)
+    if obj is not None:
+        return obj
+    row = _to_row(reading, classifier.classify(reading["water_level"], reading["device_id"], reading.get("location")))
+    stmt = upsert_statement(db, tuple(row)).values(**row).returning(models.SensorData)
+    obj = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+    refresh_latest(db, [(obj.device_id, obj.timestamp)])
+    rollup_service.refresh(db, [(obj.device_id, obj.timestamp)])
+    version_counters.bump(db, version_counters.WRITES)
+    db.commit()
+    _after_commit([reading], [row], [obj.id])
+    return obj
+
+
+def bulk_upsert(db: Session, readings: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Classify and upsert validated readings in a single transaction.
+
+    Each reading is a dict with timestamp, device_id, water_level and optional
+    location/notes/status (status is classified against the device's
+    threshold profile when missing). Writes use the dialect-native
+    INSERT ... ON CONFLICT DO UPDATE on (device_id, timestamp); the keyed
+    SELECT per chunk is only used to report inserted vs updated. Exact
+    replays of recently written readings are dropped before any query.
+    """
+    deduped = _dedupe(readings)
+    fresh = replay_filter.filter(deduped)
+    replayed = len(deduped) - len(fresh)
+    rows = _classify_rows(fresh)
+
+    inserted = 0
+    updated = 0
+    SD = models.SensorData
+    for start in range(0, len(rows), CHUNK_SIZE):
+        keys = [(r["device_id"], r["timestamp"]) for r in rows[start:start + CHUNK_SIZE]]
+        existing = db.execute(
+            select(SD.id).where(tuple_(SD.device_id, SD.timestamp).in_(keys))
+        ).all()
+        updated += len(existing)
+        inserted += len(keys) - len(existing)
+
+    write_rows(db, fresh, rows)
+    return {"inserted": inserted, "updated": updated, "replayed": replayed}
+
+
+def write_rows(db: Session, readings: List[Dict[str, Any]], rows: List[Dict[str, Any]]):
+    """Upsert classified rows (see _to_row), refresh device_latest and the
+    rollups for them, and commit. `readings` are the inputs the rows came
+    from, remembered by the replay filter."""
+    if not rows:
+        return
+    # executemany needs uniform keys, so rows are grouped by the columns they carry
+    for columns, group in groupby(sorted(rows, key=lambda r: tuple(r)), key=lambda r: tuple(r)):
+        db.execute(upsert_statement(db, columns), list(group))
+
+    keys = [(r["device_id"], r["timestamp"]) for r in rows]
+    refresh_latest(db, keys)
+    rollup_service.refresh(db, keys)
+    version_counters.bump(db, version_counters.WRITES)
+    db.commit()
+    _after_commit(readings, rows)
+
+
+def diff_readings(db: Session, readings: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Classify readings and drop those already stored with the same values.
+
+    Stored rows are loaded with one range query over the batch's devices and
+    time span, and compared in memory, instead of looking each key up. Suits
+    batches that are mostly re-reads of a contiguous window, such as sheet
+    pages. Returns the rows to pass to write_rows() and the inserted /
+    updated / unchanged counts.
+    """
+    rows = _classify_rows(_dedupe(readings))
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not rows:
+        return [], counts
+    SD = models.SensorData
+    compared = ("water_level", "status", *OPTIONAL_COLUMNS)
+    stamps = [r["timestamp"] for r in rows]
+    stored = {
+        (device_id, ts): dict(zip(compared, values))
+        for device_id, ts, *values in db.execute(
+            select(SD.device_id, SD.timestamp, *[getattr(SD, c) for c in compared]).where(
+                SD.device_id.in_({r["device_id"] for r in rows}),
+                SD.timestamp >= min(stamps),
+                SD.timestamp <= max(stamps),
+            )
+        )
+    }
+    changed = []
+    for row, ts in zip(rows, stamps):
+        old = stored.get((row["device_id"], ts))
+        if old is None:
+            counts["inserted"] += 1
+        elif any(old[c] != row[c] for c in compared if c in row):
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+            continue
+        changed.append(row)
+    return changed, counts
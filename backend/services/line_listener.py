@@ -0,0 +1,171 @@
+# backend/services/line_listener.py
+"""
+Plain-text line protocol listener for loggers that cannot speak HTTP.
+
+One reading per line, whitespace separated:
+
+    <device_id> <timestamp> <distance_cm>
+
+timestamp is epoch seconds (UTC, stored as wall time in DEVICE_TIMEZONE) or
+a timestamp without spaces such as 2025-01-01T10:00:00. Lines are accepted over TCP (a stream of lines) and UDP
+(one or more lines per datagram) and handed to the write-behind ingest queue,
+which group-commits them through ingest_service.bulk_upsert.
+"""
+import asyncio
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services.ingest_queue import ingest_queue
+from backend.services.timestamp_parser import default_parser, from_epoch
+
+MAX_LINE_BYTES = 1024
+
+
+def parse_line(line: str) -> Dict[str, Any]:
+    """Parse one protocol line into a reading; raises ValueError when malformed."""
+    parts = line.split()
+    if len(parts) != 3:
+        raise ValueError(f"Expected 3 fields, got {len(parts)}")
+    device_id, ts_raw, dist_raw = parts
+    try:
+        seconds: Optional[float] = float(ts_raw)
+    except ValueError:
+        seconds = None
+    if seconds is not None:
+        ts = from_epoch(seconds)
+    else:
+        ts = default_parser.parse(ts_raw, key=f"device:{device_id}")
+        if ts is None:
+            raise ValueError(f"Unsupported timestamp: {ts_raw}")
+    distance = float(dist_raw)
+    if not math.isfinite(distance) or distance < 0:
+        raise ValueError(f"Invalid distance_cm: {dist_raw}")
+    return {"timestamp": ts, "device_id": device_id, "water_level": distance}
+
+
+def parse_lines(data: bytes) -> Tuple[List[Dict[str, Any]], int]:
+    """Parse a block of complete lines; returns (readings, rejected_count)."""
+    readings = []
+    rejected = 0
+    for raw in data.split(b"\n"):
+        if not raw.strip():
+            continue
+        try:
+            readings.append(parse_line(raw.decode("utf-8")))
+        except (ValueError, OverflowError, UnicodeDecodeError):
+            # one bad line must not take down the rest of the block or the connection
+            rejected += 1
+    return readings, rejected
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "LineProtocolListener"):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr):
+        readings, rejected = parse_lines(data)
+        self.listener.rejected += rejected
+        accepted = ingest_queue.submit_many(readings)
+        self.listener.accepted += accepted
+        # UDP has no flow control; drop what does not fit
+        self.listener.dropped += len(readings) - accepted
+
+
+class LineProtocolListener:
+    """TCP and UDP servers for the line protocol, run on the app's event loop."""
+
+    def __init__(self, host: str = "0.0.0.0", tcp_port: Optional[int] = None, udp_port: Optional[int] = None, read_size: int = 65536):
+        self.host = host
+        self.tcp_port = tcp_port
+        self.udp_port = udp_port
+        self.read_size = read_size
+        self._tcp_server: Optional[asyncio.AbstractServer] = None
+        self._udp_transport: Optional[asyncio.DatagramTransport] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.tcp_port is not None:
+            self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.tcp_port)
+            self.tcp_port = self._tcp_server.sockets[0].getsockname()[1]
+            print(f"[LineProtocolListener] TCP listening on {self.host}:{self.tcp_port}")
+        if self.udp_port is not None:
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UDPProtocol(self), local_addr=(self.host, self.udp_port)
+            )
+            self.udp_port = self._udp_transport.get_extra_info("sockname")[1]
+            print(f"[LineProtocolListener] UDP listening on {self.host}:{self.udp_port}")
+
+    async def stop(self):
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+
+    async def _submit(self, readings: List[Dict[str, Any]]):
+        # TCP gets backpressure: stop reading from the socket until the queue drains
+        while readings:
+            accepted = ingest_queue.submit_many(readings)
+            self.accepted += accepted
+            readings = readings[accepted:]
+            if readings:
+                await asyncio.sleep(0.05)
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = b""
+        discarding = False  # inside an overlong line, skipping to its newline
+        try:
+            while True:
+                data = await reader.read(self.read_size)
+                if not data:
+                    break
+                if discarding:
+                    nl = data.find(b"\n")
+                    if nl < 0:
+                        continue
+                    data = data[nl + 1:]
+                    discarding = False
+                pending += data
+                cut = pending.rfind(b"\n")
+                if cut >= 0:
+                    readings, rejected = parse_lines(pending[:cut])
+                    pending = pending[cut + 1:]
+                    self.rejected += rejected
+                    await self._submit(readings)
+                if len(pending) > MAX_LINE_BYTES:
+                    # the rest of this line must not be parsed as a line of its own
+                    self.rejected += 1
+                    pending = b""
+                    discarding = True
+            if pending.strip():
+                readings, rejected = parse_lines(pending)
+                self.rejected += rejected
+                await self._submit(readings)
+        finally:
+            writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tcp_port": self.tcp_port if self._tcp_server else None,
+            "udp_port": self.udp_port if self._udp_transport else None,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+        }
+
+
+def _port(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+line_listener = LineProtocolListener(
+    host=os.getenv("LINE_PROTOCOL_HOST", "0.0.0.0"),
+    tcp_port=_port("LINE_PROTOCOL_TCP_PORT"),
+    udp_port=_port("LINE_PROTOCOL_UDP_PORT"),
+)
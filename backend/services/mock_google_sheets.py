@@ -4,17 +4,22 @@ Use this when credentials.json is not available
 """
 
 import json
+import os
 import random
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
 
 class MockGoogleSheetsService:
     """Mock service that simulates Google Sheets API responses"""
     
-    def __init__(self, credentials_file=None, spreadsheet_id=None, sheet_name="Data"):
+    def __init__(self, credentials_file=None, spreadsheet_id=None, sheet_name="Data", allowed_device=None):
         self.credentials_file = credentials_file
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
+        self.allowed_device = allowed_device
         self.mock_data = self._generate_mock_data()
         print(f"🔧 MockGoogleSheetsService initialized (Development Mode)")
     
@@ -72,6 +77,31 @@ class MockGoogleSheetsService:
         print(f"📝 Mock: Added sensor reading for {device_id}")
         return True
     
+    # --- worksheet-style access used by backend/services/sheet_sync.py ---
+    HEADER = ["timestamp", "device_id", "distance_cm", "location"]
+
+    @property
+    def sheet_key(self) -> str:
+        return self.spreadsheet_id or "mock"
+
+    @property
+    def timestamp_key(self) -> str:
+        return f"sheet:{self.sheet_key}:{self.sheet_name}:timestamp"
+
+    def _values(self) -> List[List[str]]:
+        # a sheet is appended to, so rows run oldest first
+        return [self.HEADER] + [
+            [r["timestamp"], r["device_id"], str(r["water_level"]), r["location"]]
+            for r in reversed(self.mock_data)
+        ]
+
+    def read_header(self) -> List[str]:
+        return list(self.HEADER)
+
+    def read_rows(self, first_row: int, count: int, width: int) -> List[List[str]]:
+        """Rows first_row .. first_row + count - 1 (1-based, header is row 1)."""
+        return [row[:width] for row in self._values()[first_row - 1:first_row - 1 + count]]
+
     def get_latest_alerts(self) -> List[Dict]:
         """Get sensors with warning/critical status"""
         alerts = []
@@ -106,27 +136,26 @@ class MockGoogleSheetsService:
         return MockSpreadsheet()
 
 
+_mock_service: Optional["MockGoogleSheetsService"] = None
+
+
 def get_google_sheets_service():
-    """Factory function to get appropriate Google Sheets service"""
-    import os
-    from dotenv import load_dotenv
-    
-    load_dotenv()
-    
+    """The shared Google Sheets service, or the shared mock when credentials
+    are missing or unusable"""
+    global _mock_service
     credentials_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'config/credentials.json')
-    
+
     # Check if credentials file exists and has content
     if os.path.exists(credentials_file) and os.path.getsize(credentials_file) > 0:
         try:
-            from backend.services.google_sheets_service import GoogleSheetsService
-            print("🔗 Using real Google Sheets service")
-            return GoogleSheetsService()
+            from backend.services.google_sheets_service import sheets_registry
+            return sheets_registry.service(credentials_file)
         except Exception as e:
             print(f"⚠️  Google Sheets service failed, using mock: {e}")
-            return MockGoogleSheetsService()
-    else:
-        print("🔧 Credentials not found, using mock Google Sheets service")
-        return MockGoogleSheetsService()
+    if _mock_service is None:
+        print("🔧 Credentials not found or unusable, using mock Google Sheets service")
+        _mock_service = MockGoogleSheetsService()
+    return _mock_service
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+# backend/services/reading_query.py
+import base64
+import datetime
+import json
+from typing import Any, Optional, Tuple
+from sqlalchemy import select, tuple_
+from backend import models
+
+SD = models.SensorData
+
+# SensorDataOut fields, selected as plain columns for the fast JSON path
+READING_FIELDS = ("id", "timestamp", "device_id", "water_level", "location", "status", "notes", "created_at")
+READING_COLUMNS = tuple(getattr(SD, f) for f in READING_FIELDS)
+
+# cursor modes: "id" pages the legacy newest-id-first listing, "ts" pages
+# (timestamp, id) descending and is used whenever a device or time filter is set
+ID_MODE = "id"
+TS_MODE = "ts"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(mode: str, last_id: int, last_ts: Optional[datetime.datetime] = None) -> str:
+    payload = {"m": mode, "id": last_id}
+    if mode == TS_MODE:
+        payload["ts"] = last_ts.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, Optional[datetime.datetime]]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        mode = payload["m"]
+        if mode == TS_MODE:
+            return mode, int(payload["id"]), datetime.datetime.fromisoformat(payload["ts"])
+        if mode == ID_MODE:
+            return mode, int(payload["id"]), None
+    except Exception:
+        pass
+    raise InvalidCursor("Invalid cursor")
+
+
+def readings_select(
+    *columns: Any,
+    limit: int = 100,
+    device_id: Optional[str] = None,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    cursor: Optional[str] = None,
+):
+    """Build a keyset-paginated SELECT over sensor_data.
+
+    Returns (statement, mode). Filters on device_id/start/end are served by the
+    (device_id, timestamp) index; the cursor turns the page boundary into a
+    range predicate, so deep pages cost the same as the first one.
+    The caller must select SD.id and SD.timestamp to build the next cursor.
+    """
+    cursor_mode, cursor_id, cursor_ts = decode_cursor(cursor) if cursor else (None, None, None)
+    filtered = device_id is not None or start is not None or end is not None
+    mode = cursor_mode or (TS_MODE if filtered else ID_MODE)
+
+    stmt = select(*columns) if columns else select(SD)
+    if device_id is not None:
+        stmt = stmt.where(SD.device_id == device_id)
+    if start is not None:
+        stmt = stmt.where(SD.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(SD.timestamp <= end)
+    if mode == TS_MODE:
+        if cursor_ts is not None:
+            stmt = stmt.where(tuple_(SD.timestamp, SD.id) < tuple_(cursor_ts, cursor_id))
+        stmt = stmt.order_by(SD.timestamp.desc(), SD.id.desc())
+    else:
+        if cursor_id is not None:
+            stmt = stmt.where(SD.id < cursor_id)
+        stmt = stmt.order_by(SD.id.desc())
+    return stmt.limit(limit), mode
+
+
+def next_cursor(mode: str, rows: list, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    last_ts = last.timestamp
+    if isinstance(last_ts, str):  # raw stored text, see columnar.select_columns
+        last_ts = datetime.datetime.fromisoformat(last_ts)
+    return encode_cursor(mode, last.id, last_ts)
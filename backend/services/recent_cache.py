@@ -0,0 +1,187 @@
+# backend/services/recent_cache.py
+import datetime
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from backend import models
+
+STATUSES = ("normal", "warning", "critical")
+_STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def to_epoch(ts: datetime.datetime) -> float:
+    return (ts - _EPOCH).total_seconds()
+
+
+def from_epoch(seconds: float) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(seconds=seconds)
+
+
+class DeviceRing:
+    """Fixed-size ring of one device's newest readings, ordered by timestamp.
+
+    Backed by numpy arrays (epoch seconds, water level, status code). Appends
+    of newer readings are O(1); a resend of a buffered timestamp is updated in
+    place and an out-of-order reading is spliced in (rare, O(capacity)).
+    `complete` means the ring holds the device's entire history.
+    """
+
+    def __init__(self, capacity: int, complete: bool = True):
+        self.capacity = capacity
+        self.ts = np.empty(capacity, dtype=np.float64)
+        self.level = np.empty(capacity, dtype=np.float64)
+        self.status = np.empty(capacity, dtype=np.int8)
+        self.start = 0
+        self.size = 0
+        self.complete = complete
+
+    def _ordered(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        idx = (self.start + np.arange(self.size)) % self.capacity
+        return self.ts[idx], self.level[idx], self.status[idx]
+
+    def _newest(self) -> float:
+        return self.ts[(self.start + self.size - 1) % self.capacity]
+
+    def add(self, ts: float, level: float, status_code: int):
+        if self.size == 0 or ts > self._newest():
+            pos = (self.start + self.size) % self.capacity
+            self.ts[pos], self.level[pos], self.status[pos] = ts, level, status_code
+            if self.size < self.capacity:
+                self.size += 1
+            else:
+                self.start = (self.start + 1) % self.capacity
+                self.complete = False
+            return
+        ts_arr, level_arr, status_arr = self._ordered()
+        i = int(np.searchsorted(ts_arr, ts))
+        if i < self.size and ts_arr[i] == ts:
+            pos = (self.start + i) % self.capacity
+            self.level[pos], self.status[pos] = level, status_code
+            return
+        if i == 0 and self.size == self.capacity:
+            # older than everything buffered; the ring no longer has the full history anyway
+            self.complete = False
+            return
+        ts_arr = np.insert(ts_arr, i, ts)[-self.capacity:]
+        level_arr = np.insert(level_arr, i, level)[-self.capacity:]
+        status_arr = np.insert(status_arr, i, status_code)[-self.capacity:]
+        if len(ts_arr) == self.capacity and self.size == self.capacity:
+            self.complete = False
+        self.size = len(ts_arr)
+        self.start = 0
+        self.ts[:self.size], self.level[:self.size], self.status[:self.size] = ts_arr, level_arr, status_arr
+
+    def covers(self, since: Optional[float]) -> bool:
+        if self.complete:
+            return True
+        return since is not None and self.size > 0 and since >= self.ts[self.start]
+
+    def window(self, since: Optional[float], until: Optional[float], limit: Optional[int]):
+        """Readings in [since, until], newest first, at most `limit`."""
+        ts_arr, level_arr, status_arr = self._ordered()
+        lo = int(np.searchsorted(ts_arr, since, side="left")) if since is not None else 0
+        hi = int(np.searchsorted(ts_arr, until, side="right")) if until is not None else self.size
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return ts_arr[lo:hi][::-1], level_arr[lo:hi][::-1], status_arr[lo:hi][::-1]
+
+
+class RecentCache:
+    """Per-device rings of recent readings, filled from the DB at startup and
+    kept current by the ingest path, so recent-window reads never touch SQLite."""
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._rings: Dict[str, DeviceRing] = {}
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load_rows(self, db: Session, device_id: Optional[str] = None) -> Dict[str, List]:
+        SD = models.SensorData
+        rn = func.row_number().over(partition_by=SD.device_id, order_by=SD.timestamp.desc()).label("rn")
+        inner = select(SD.device_id, SD.timestamp, SD.water_level, SD.status, rn)
+        if device_id is not None:
+            inner = inner.where(SD.device_id == device_id)
+        inner = inner.subquery()
+        rows: Dict[str, List] = {}
+        for dev, ts, level, status_val in db.execute(
+            select(inner.c.device_id, inner.c.timestamp, inner.c.water_level, inner.c.status)
+            .where(inner.c.rn <= self.capacity)
+        ):
+            rows.setdefault(dev, []).append((ts, level, status_val))
+        return rows
+
+    def _build(self, readings: List) -> DeviceRing:
+        # a device with fewer rows than the capacity is fully buffered
+        ring = DeviceRing(self.capacity, complete=len(readings) < self.capacity)
+        for ts, level, status_val in sorted(readings, key=lambda r: r[0]):
+            ring.add(to_epoch(ts), level, _STATUS_CODE.get(status_val, 0))
+        return ring
+
+    def load(self, db: Session):
+        """Fill every device's ring with its newest `capacity` readings."""
+        rows = self._load_rows(db)
+        with self._lock:
+            self._rings = {dev: self._build(readings) for dev, readings in rows.items()}
+            self.loaded = True
+
+    def reload_device(self, db: Session, device_id: str):
+        """Rebuild one device's ring, e.g. after its stored statuses were rewritten."""
+        if not self.loaded:
+            return
+        readings = self._load_rows(db, device_id).get(device_id, [])
+        with self._lock:
+            self._rings[device_id] = self._build(readings)
+
+    def record(self, rows: List[Dict[str, Any]]):
+        """Apply committed rows (dicts with timestamp, device_id, water_level, status)."""
+        if not self.loaded:
+            return
+        with self._lock:
+            for r in rows:
+                ring = self._rings.get(r["device_id"])
+                if ring is None:
+                    # loaded before this device ever wrote, so this is its full history
+                    ring = self._rings[r["device_id"]] = DeviceRing(self.capacity)
+                ring.add(to_epoch(r["timestamp"]), r["water_level"], _STATUS_CODE.get(r.get("status"), 0))
+
+    def query(
+        self,
+        device_id: str,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Serve a window from memory, or return None when the ring cannot cover it."""
+        since_s = to_epoch(since) if since is not None else None
+        until_s = to_epoch(until) if until is not None else None
+        with self._lock:
+            if not self.loaded:
+                self.misses += 1
+                return None
+            ring = self._rings.get(device_id)
+            if ring is None:
+                self.hits += 1
+                return []
+            ts_arr, level_arr, status_arr = ring.window(since_s, until_s, limit)
+            # without `since`, a "newest N" query is servable once the buffer yields N rows
+            if not ring.covers(since_s) and not (since_s is None and limit is not None and len(ts_arr) == limit):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [
+            {"timestamp": from_epoch(t), "water_level": lv, "status": STATUSES[sc]}
+            for t, lv, sc in zip(ts_arr.tolist(), level_arr.tolist(), status_arr.tolist())
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"loaded": self.loaded, "devices": len(self._rings), "hits": self.hits, "misses": self.misses}
+
+
+recent_cache = RecentCache(capacity=int(os.getenv("RECENT_CACHE_SIZE", "2048")))
@@ -0,0 +1,91 @@
+# backend/services/replay_filter.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _fingerprint(reading: Dict[str, Any]) -> Tuple:
+    return (float(reading["water_level"]), reading.get("location"), reading.get("notes"))
+
+
+class ReplayFilter:
+    """In-memory index of recently written readings, per device.
+
+    Devices on flaky links resend the same readings; a resend with the same
+    (device_id, timestamp) and identical values is a replay and can be dropped
+    before it reaches the database. A resend with different values is a real
+    update and passes through. Each device keeps at most `per_device` keys and
+    entries older than `window_s` seconds are ignored.
+    """
+
+    def __init__(self, per_device: int = 512, window_s: float = 86400.0):
+        self.per_device = per_device
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._recent: Dict[str, "OrderedDict[Any, Tuple[Tuple, float, Optional[int]]]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, reading: Dict[str, Any], now: float) -> Optional[Tuple[Tuple, float, Optional[int]]]:
+        entry = self._recent.get(reading["device_id"], {}).get(reading["timestamp"])
+        if entry is None or now - entry[1] > self.window_s or entry[0] != _fingerprint(reading):
+            return None
+        return entry
+
+    def replay_id(self, reading: Dict[str, Any]) -> Optional[int]:
+        """Row id of a recent identical write of this reading, if known. Not
+        counted: the caller reports with count() whether it skipped the write."""
+        with self._lock:
+            entry = self._lookup(reading, time.monotonic())
+            return None if entry is None else entry[2]
+
+    def count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def filter(self, readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop exact replays from a batch."""
+        now = time.monotonic()
+        with self._lock:
+            fresh = [r for r in readings if self._lookup(r, now) is None]
+            self.hits += len(readings) - len(fresh)
+            self.misses += len(fresh)
+        return fresh
+
+    def remember(self, readings: List[Dict[str, Any]], row_ids: Optional[List[Optional[int]]] = None):
+        """Record readings that were just committed."""
+        now = time.monotonic()
+        row_ids = row_ids or [None] * len(readings)
+        with self._lock:
+            for r, row_id in zip(readings, row_ids):
+                recent = self._recent.get(r["device_id"])
+                if recent is None:
+                    recent = self._recent[r["device_id"]] = OrderedDict()
+                recent[r["timestamp"]] = (_fingerprint(r), now, row_id)
+                recent.move_to_end(r["timestamp"])
+                if len(recent) > self.per_device:
+                    recent.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "devices": len(self._recent),
+        }
+
+
+replay_filter = ReplayFilter(
+    per_device=int(os.getenv("REPLAY_INDEX_SIZE", "512")),
+    window_s=float(os.getenv("REPLAY_WINDOW_S", "86400")),
+)
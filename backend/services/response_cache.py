@@ -0,0 +1,206 @@
+# backend/services/response_cache.py
+import hashlib
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import Request, Response
+from backend.database import SessionLocal
+from backend.services import version_counters
+from backend.services.fast_json import FastJSONResponse
+
+
+# random per process: data versions restart at 0 and differ between workers,
+# so an ETag from before a restart or from another worker must not match
+_BOOT_ID = secrets.token_hex(4)
+
+
+def _new_boot_id():
+    global _BOOT_ID
+    _BOOT_ID = secrets.token_hex(4)
+
+
+# workers forked after import would otherwise share the parent's id
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_new_boot_id)
+
+
+class DataVersion:
+    """Monotonic counter the write path bumps after every commit that changes readings.
+
+    Writes can also happen in other processes: ingest writes served by other
+    workers bump the persisted `writes` version counter, and bulk rewrites
+    (scripts/recompute_status.py, scripts/rebuild_rollups.py) the `readings`
+    one. poll() reads both at most every `poll_interval` seconds and bumps
+    this counter when either moved; a moved `readings` counter also runs the
+    on_external_change() callbacks. This process's own writes move `writes`
+    too, which costs at most one extra invalidation per poll.
+    """
+
+    def __init__(self, poll_interval: float = 2.0, session_factory=SessionLocal):
+        self._lock = threading.Lock()
+        self.value = 0
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self._poll_lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._external: Optional[Dict[str, int]] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    def bump(self) -> int:
+        with self._lock:
+            self.value += 1
+            return self.value
+
+    def on_external_change(self, callback: Callable[[], None]):
+        self._listeners.append(callback)
+
+    def poll(self):
+        if time.monotonic() - self._checked_at < self.poll_interval:
+            return
+        if not self._poll_lock.acquire(blocking=False):
+            return  # another request is already checking
+        try:
+            self._checked_at = time.monotonic()
+            db = self.session_factory()
+            try:
+                external = version_counters.read_many(db, (version_counters.READINGS, version_counters.WRITES))
+            except Exception as e:
+                print(f"[DataVersion] Version check failed: {e}")
+                return
+            finally:
+                db.close()
+            previous, self._external = self._external, external
+            if previous is None or external == previous:
+                return
+            self.bump()
+            if external[version_counters.READINGS] != previous[version_counters.READINGS]:
+                for callback in self._listeners:
+                    callback()
+        finally:
+            self._poll_lock.release()
+
+
+data_version = DataVersion(poll_interval=float(os.getenv("DATA_VERSION_POLL_S", "2")))
+
+
+class _Entry:
+    __slots__ = ("version", "body", "status_code", "media_type", "headers")
+
+    def __init__(self, version: int, body: bytes, status_code: int, media_type: Optional[str], headers: Dict[str, str]):
+        self.version = version
+        self.body = body
+        self.status_code = status_code
+        self.media_type = media_type
+        self.headers = headers
+
+
+class ResponseCache:
+    """LRU cache of rendered read responses keyed by path, query string and
+    Accept header. An entry is valid only for the data version it was built
+    at, so any committed write invalidates everything at once. Each response
+    carries an ETag derived from (process, key, version); a poll whose If-None-Match
+    still matches gets a 304 without running the route."""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        return f"{request.url.path}?{query}|{request.headers.get('accept', '')}"
+
+    @staticmethod
+    def _etag(key: str, version: int) -> str:
+        return f'"{_BOOT_ID}-{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+    def _response(self, entry: _Entry, etag: str) -> Response:
+        headers = {**entry.headers, "ETag": etag, "Cache-Control": "no-cache"}
+        return Response(content=entry.body, status_code=entry.status_code, media_type=entry.media_type, headers=headers)
+
+    def _store(self, key: str, entry: _Entry):
+        size = len(entry.body)
+        if size > self.max_bytes // 8:
+            return  # bulk pulls would evict everything else
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def _lookup(self, key: str, version: int) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def serve(self, request: Request, build: Callable[[], Any], model: Any = None) -> Response:
+        """Answer from cache or call `build()`. `build` may return a Response
+        (its rendered body is cached) or plain data, which is validated
+        through `model` (a pydantic type) when given and encoded as JSON.
+        Concurrent misses on one key build it once."""
+        data_version.poll()
+        key = self._key(request)
+        version = data_version.value
+        etag = self._etag(key, version)
+        if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+            self.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        entry = self._lookup(key, version)
+        if entry is not None:
+            self.hits += 1
+            return self._response(entry, etag)
+
+        with self._lock:
+            building = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with building:
+                entry = self._lookup(key, version)
+                if entry is not None:
+                    self.hits += 1
+                    return self._response(entry, etag)
+                self.misses += 1
+                result = build()
+                if not isinstance(result, Response):
+                    if model is not None:
+                        result = model.model_validate(result).model_dump(mode="json")
+                    result = FastJSONResponse(result)
+                headers = {k: v for k, v in result.headers.items() if k.lower() not in ("content-length", "content-type")}
+                entry = _Entry(version, bytes(result.body), result.status_code, result.media_type, headers)
+                self._store(key, entry)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return self._response(entry, etag)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "version": data_version.value,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
@@ -0,0 +1,193 @@
+# backend/services/rollup_service.py
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, literal, select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.services import version_counters
+from backend.services.response_cache import data_version
+from backend.services.stats_service import bucket_expr
+
+SD = models.SensorData
+RU = models.ReadingRollup.__table__  # Core table: rollups are written with INSERT ... SELECT
+
+# resolution -> (bucket width, bucket_expr granularity), finest first; each
+# level is aggregated from the one before it, 1m from raw sensor_data rows
+RESOLUTIONS = {
+    "1m": (datetime.timedelta(minutes=1), "minute"),
+    "1h": (datetime.timedelta(hours=1), "hour"),
+    "1d": (datetime.timedelta(days=1), "day"),
+}
+_LEVELS = list(RESOLUTIONS)
+
+ROLLUP_COLUMNS = (
+    "resolution", "device_id", "bucket", "reading_count", "level_sum",
+    "level_min", "level_max", "last_timestamp", "last_level",
+)
+
+
+def floor_bucket(ts: datetime.datetime, resolution: str) -> datetime.datetime:
+    ts = ts.replace(second=0, microsecond=0)
+    if resolution != "1m":
+        ts = ts.replace(minute=0)
+    if resolution == "1d":
+        ts = ts.replace(hour=0)
+    return ts
+
+
+def pick_resolution(step: datetime.timedelta) -> str:
+    """Coarsest rollup whose buckets are no wider than `step`."""
+    chosen = _LEVELS[0]
+    for resolution in _LEVELS:
+        if RESOLUTIONS[resolution][0] <= step:
+            chosen = resolution
+    return chosen
+
+
+def _rollup_select(db: Session, resolution: str, device_id=None, start=None, end=None):
+    """SELECT producing `resolution` rows from the level below it, for one
+    device and the source rows in [start, end) when given (values or bindparams)."""
+    level = _LEVELS.index(resolution)
+    if level == 0:
+        device, ts = SD.device_id, SD.timestamp
+        n, total, lo, hi, last_ts, last_level = literal(1), SD.water_level, SD.water_level, SD.water_level, SD.timestamp, SD.water_level
+        conds = []
+    else:
+        device, ts = RU.c.device_id, RU.c.bucket
+        n, total, lo, hi, last_ts, last_level = (
+            RU.c.reading_count, RU.c.level_sum, RU.c.level_min, RU.c.level_max, RU.c.last_timestamp, RU.c.last_level,
+        )
+        conds = [RU.c.resolution == _LEVELS[level - 1]]
+    if device_id is not None:
+        conds.append(device == device_id)
+    if start is not None:
+        conds.append(ts >= start)
+    if end is not None:
+        conds.append(ts < end)
+
+    bucket = bucket_expr(db, ts, RESOLUTIONS[resolution][1])
+    src = select(
+        device.label("device_id"),
+        bucket.label("bucket"),
+        n.label("n"),
+        total.label("total"),
+        lo.label("lo"),
+        hi.label("hi"),
+        last_ts.label("last_ts"),
+        func.first_value(last_level).over(partition_by=(device, bucket), order_by=last_ts.desc()).label("last_level"),
+    ).where(*conds).subquery()
+    return select(
+        literal(resolution),
+        src.c.device_id,
+        src.c.bucket,
+        func.sum(src.c.n),
+        func.sum(src.c.total),
+        func.min(src.c.lo),
+        func.max(src.c.hi),
+        func.max(src.c.last_ts),
+        func.max(src.c.last_level),  # constant within the group
+    ).group_by(src.c.device_id, src.c.bucket)
+
+
+def _upsert(db: Session, source):
+    # imported here: ingest_service calls into this module
+    from backend.services.ingest_service import _dialect_insert
+    stmt = _dialect_insert(db)(RU).from_select(list(ROLLUP_COLUMNS), source)
+    return stmt.on_conflict_do_update(
+        index_elements=[RU.c.resolution, RU.c.device_id, RU.c.bucket],
+        set_={c: stmt.excluded[c] for c in ROLLUP_COLUMNS[3:]},
+    )
+
+
+def _spans(buckets: Iterable[Tuple[str, datetime.datetime]], width: datetime.timedelta) -> List[Dict[str, Any]]:
+    """Merge touched (device_id, bucket) pairs into contiguous [lo, hi) spans per device."""
+    spans: List[Dict[str, Any]] = []
+    for device_id, bucket in sorted(set(buckets)):
+        last = spans[-1] if spans else None
+        if last is not None and last["rollup_device_id"] == device_id and last["rollup_end"] == bucket:
+            last["rollup_end"] = bucket + width
+        else:
+            spans.append({"rollup_device_id": device_id, "rollup_start": bucket, "rollup_end": bucket + width})
+    return spans
+
+
+def refresh(db: Session, keys: List[Tuple[str, datetime.datetime]]):
+    """Recompute the rollup buckets containing the given (device_id, timestamp)
+    readings, finest level first. Buckets are rebuilt from their source rows
+    rather than adjusted, so updated readings are handled too. Runs inside
+    the caller's transaction."""
+    if not keys:
+        return
+    stmts = {
+        resolution: _upsert(db, _rollup_select(
+            db, resolution,
+            device_id=bindparam("rollup_device_id"),
+            start=bindparam("rollup_start"),
+            end=bindparam("rollup_end"),
+        ))
+        for resolution in _LEVELS
+    }
+    for resolution in _LEVELS:
+        width = RESOLUTIONS[resolution][0]
+        spans = _spans(((d, floor_bucket(ts, resolution)) for d, ts in keys), width)
+        db.execute(stmts[resolution], spans)
+
+
+def rebuild(
+    db: Session,
+    device_id: Optional[str] = None,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+) -> Dict[str, int]:
+    """Recompute all rollups (optionally for one device / time range) from
+    sensor_data, e.g. after a bulk load that bypassed the ingest path.
+    The range is widened to whole days so every level stays consistent."""
+    lo = floor_bucket(start, "1d") if start is not None else None
+    hi = floor_bucket(end, "1d") + RESOLUTIONS["1d"][0] if end is not None else None
+    written = {}
+    for resolution in _LEVELS:
+        conds = [RU.c.resolution == resolution]
+        if device_id is not None:
+            conds.append(RU.c.device_id == device_id)
+        if lo is not None:
+            conds.append(RU.c.bucket >= lo)
+        if hi is not None:
+            conds.append(RU.c.bucket < hi)
+        db.execute(delete(RU).where(*conds))
+        written[resolution] = db.execute(
+            _upsert(db, _rollup_select(db, resolution, device_id=device_id, start=lo, end=hi))
+        ).rowcount
+    version_counters.bump(db, version_counters.READINGS)
+    db.commit()
+    data_version.bump()
+    return written
+
+
+def query(
+    db: Session,
+    resolution: str,
+    device_id: Optional[str] = None,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Rollup rows of one resolution whose buckets overlap [start, end], oldest first."""
+    q = select(RU).where(RU.c.resolution == resolution)
+    if device_id is not None:
+        q = q.where(RU.c.device_id == device_id)
+    if start is not None:
+        q = q.where(RU.c.bucket >= floor_bucket(start, resolution))
+    if end is not None:
+        q = q.where(RU.c.bucket <= end)
+    return [
+        {
+            "device_id": r.device_id,
+            "bucket": r.bucket,
+            "count": r.reading_count,
+            "average_water_level": r.level_sum / r.reading_count,
+            "min_water_level": r.level_min,
+            "max_water_level": r.level_max,
+            "last_timestamp": r.last_timestamp,
+            "last_water_level": r.last_level,
+        }
+        for r in db.execute(q.order_by(RU.c.device_id, RU.c.bucket))
+    ]
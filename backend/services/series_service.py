@@ -0,0 +1,153 @@
+# backend/services/series_service.py
+import datetime
+import os
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.services import rollup_service
+
+SD = models.SensorData
+RU = models.ReadingRollup.__table__
+
+# above this many raw readings in range, points are taken from a rollup instead
+SERIES_RAW_LIMIT = int(os.getenv("SERIES_RAW_LIMIT", "200000"))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n` >= 3 points (first and
+    last included) that keep the visual shape of the sorted series (x, y)."""
+    size = len(x)
+    if n >= size:
+        return np.arange(size)
+    # n - 2 interior buckets of (almost) equal point counts
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    counts = np.diff(np.append(edges, size))
+    # mean of every bucket, the last "bucket" being the final point alone
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+    idx = np.empty(n, dtype=np.int64)
+    idx[0], idx[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # twice the triangle area between the previous pick, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    # LTTB usually keeps the extremes but does not guarantee it, so both are
+    # placed last; when they share a bucket the second one takes the pick of
+    # the neighbouring bucket on its side. With no room for both (n == 3) the
+    # flood peak (the smallest distance) wins.
+    taken = None
+    for extreme in (int(y.argmin()), int(y.argmax())):
+        if extreme in (0, size - 1):
+            continue
+        slot = int(np.searchsorted(edges, extreme, side="right"))
+        if slot == taken:
+            side = 1 if extreme > idx[slot] else -1
+            slot = next((s for s in (slot + side, slot - side) if 1 <= s <= n - 2), None)
+            if slot is None:
+                continue
+        idx[slot] = extreme
+        taken = slot
+    idx.sort()
+    return idx
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of n/2 equal-time buckets, in time order."""
+    size = len(x)
+    if n >= size:
+        return np.arange(size)
+    span = x[-1] - x[0]
+    buckets = max(n // 2, 1)
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1) if span > 0 else np.zeros(size, dtype=np.int64)
+    # sorted by (bucket, y): the first of each bucket is its min, the last its max
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.diff(bucket[order], prepend=-1))
+    ends = np.append(starts[1:], size) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def _range_conds(column, start, end):
+    conds = []
+    if start is not None:
+        conds.append(column >= start)
+    if end is not None:
+        conds.append(column <= end)
+    return conds
+
+
+def load_points(
+    db: Session,
+    device_id: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+) -> Tuple[np.ndarray, np.ndarray, str]:
+    """(epoch seconds, water level, source) for a device over [start, end].
+
+    Raw readings when there are at most SERIES_RAW_LIMIT of them; otherwise
+    the finest rollup that fits, each bucket contributing its min and max at
+    the bucket midpoint, so peaks survive at the rollup's time resolution.
+    """
+    hourly = select(func.coalesce(func.sum(RU.c.reading_count), 0)).where(
+        RU.c.resolution == "1h", RU.c.device_id == device_id,
+        *_range_conds(RU.c.bucket, rollup_service.floor_bucket(start, "1h") if start else None, end),
+    )
+    if db.execute(hourly).scalar() <= SERIES_RAW_LIMIT:
+        rows = db.execute(
+            select(SD.timestamp, SD.water_level)
+            .where(SD.device_id == device_id, *_range_conds(SD.timestamp, start, end))
+            .order_by(SD.timestamp)
+        ).all()
+        ts = np.array([r[0] for r in rows], dtype="datetime64[us]").astype(np.int64) / 1e6
+        return ts, np.array([r[1] for r in rows], dtype=np.float64), "raw"
+
+    for resolution, (width, _) in rollup_service.RESOLUTIONS.items():
+        conds = [
+            RU.c.resolution == resolution, RU.c.device_id == device_id,
+            *_range_conds(RU.c.bucket, rollup_service.floor_bucket(start, resolution) if start else None, end),
+        ]
+        if db.execute(select(func.count()).select_from(RU).where(*conds)).scalar() * 2 <= SERIES_RAW_LIMIT:
+            break
+    rows = db.execute(select(RU.c.bucket, RU.c.level_min, RU.c.level_max).where(*conds).order_by(RU.c.bucket)).all()
+    mid = np.array([r[0] for r in rows], dtype="datetime64[us]").astype(np.int64) / 1e6 + width.total_seconds() / 2
+    ts = np.repeat(mid, 2)
+    levels = np.array([(r[1], r[2]) for r in rows], dtype=np.float64).reshape(-1)
+    return ts, levels, resolution
+
+
+def downsample_columns(
+    db: Session,
+    device_id: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    points: int = 2000,
+    method: str = "lttb",
+) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """(metadata, columns) of the downsample; timestamps are datetime64[us]."""
+    ts, levels, source = load_points(db, device_id, start, end)
+    idx = (lttb if method == "lttb" else minmax)(ts, levels, points) if len(ts) else np.arange(0)
+    meta = {"device_id": device_id, "method": method, "source": source, "total_points": len(ts)}
+    micros = np.round(ts[idx] * 1e6).astype(np.int64)
+    return meta, {"timestamp": micros.astype("datetime64[us]"), "water_level": levels[idx]}
+
+
+def downsample(
+    db: Session,
+    device_id: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    points: int = 2000,
+    method: str = "lttb",
+) -> Dict[str, Any]:
+    meta, columns = downsample_columns(db, device_id, start, end, points, method)
+    return {
+        **meta,
+        "points": [
+            {"timestamp": t, "water_level": lv}
+            for t, lv in zip(columns["timestamp"].tolist(), columns["water_level"].tolist())
+        ],
+    }
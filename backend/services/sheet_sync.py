@@ -0,0 +1,128 @@
+# backend/services/sheet_sync.py
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend import models
+from backend.services import ingest_service
+from backend.services.google_sheets_service import parse_rows
+
+# rows per A1 range request
+SHEET_PAGE_ROWS = int(os.getenv("SHEET_PAGE_ROWS", "5000"))
+# processed rows re-read and compared on every sync to detect edits
+SHEET_VERIFY_ROWS = int(os.getenv("SHEET_VERIFY_ROWS", "5"))
+
+
+def _checksum(header: List[str], rows: List[List[str]]) -> str:
+    return hashlib.sha256(json.dumps([header, rows], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _milliseconds(timings: Dict[str, float]) -> Dict[str, float]:
+    return {phase: round(seconds * 1000, 1) for phase, seconds in timings.items()}
+
+
+def get_state(db: Session, spreadsheet_id: str, sheet_name: str) -> models.SheetSyncState:
+    SSS = models.SheetSyncState
+    state = db.scalars(
+        select(SSS).where(SSS.spreadsheet_id == spreadsheet_id, SSS.sheet_name == sheet_name)
+    ).first()
+    if state is None:
+        state = SSS(spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, last_row=1, full_scans=0)
+    return state
+
+
+def sync_sheet(db: Session, gss, limit: Optional[int] = None, page_size: int = SHEET_PAGE_ROWS) -> Dict[str, Any]:
+    """Upsert the rows appended to a worksheet since the last sync.
+
+    The persisted cursor (SheetSyncState.last_row) says where to resume. The
+    first page also re-reads the last SHEET_VERIFY_ROWS processed rows; if
+    they or the header no longer match the stored checksum, rows were edited,
+    inserted or deleted above the cursor and the sheet is rescanned from the
+    top. Rows are fetched as bounded A1 ranges and written page by page,
+    committing the cursor after each, so an interrupted sync resumes.
+    Each page is diffed against the stored rows of its time span and only
+    new or changed readings are written. `limit` caps the rows processed in
+    this run. `timings_ms` breaks the run down into fetch, parse, diff and
+    write.
+    """
+    timings = {"fetch": 0.0, "parse": 0.0, "diff": 0.0, "write": 0.0}
+    clock = time.perf_counter()
+
+    def lap(phase: str):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[phase] += now - clock
+        clock = now
+
+    state = get_state(db, gss.sheet_key, gss.sheet_name)
+    header = gss.read_header()
+    result = {
+        "mode": "initial" if state.checksum is None else "incremental",
+        "rows_fetched": 0,
+        "pages": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "total_from_sheet": 0,
+        "last_row": state.last_row,
+    }
+    lap("fetch")
+    if not header:
+        return {**result, "timings_ms": _milliseconds(timings)}
+    width = len(header)
+
+    next_row = state.last_row + 1
+    tail: List[List[str]] = []
+    pending: Optional[List[List[str]]] = None
+    budget = limit if limit else None
+    requested = min(page_size, budget) if budget else page_size
+    if result["mode"] == "incremental":
+        verify_from = max(2, state.last_row - SHEET_VERIFY_ROWS + 1)
+        n_verify = state.last_row - verify_from + 1
+        first = gss.read_rows(verify_from, n_verify + requested, width)
+        result["pages"] += 1
+        lap("fetch")
+        check = first[:n_verify]
+        if len(check) < n_verify or _checksum(header, check) != state.checksum:
+            result["mode"] = "full"
+            state.full_scans = (state.full_scans or 0) + 1
+            next_row = 2
+        else:
+            tail = check
+            pending = first[n_verify:]
+
+    while budget is None or budget > 0:
+        if pending is None:
+            requested = min(page_size, budget) if budget else page_size
+            pending = gss.read_rows(next_row, requested, width)
+            result["pages"] += 1
+            lap("fetch")
+        readings = parse_rows(header, pending, gss.allowed_device, gss.timestamp_key)
+        lap("parse")
+        rows, counts = ingest_service.diff_readings(db, readings)
+        for k in ("inserted", "updated", "unchanged"):
+            result[k] += counts[k]
+        lap("diff")
+        ingest_service.write_rows(db, readings, rows)
+        result["rows_fetched"] += len(pending)
+        result["total_from_sheet"] += len(readings)
+
+        next_row += len(pending)
+        tail = (tail + pending)[-SHEET_VERIFY_ROWS:] if SHEET_VERIFY_ROWS else []
+        state.last_row = next_row - 1
+        state.checksum = _checksum(header, tail)
+        db.add(state)
+        db.commit()
+        lap("write")
+        if budget is not None:
+            budget -= len(pending)
+        if len(pending) < requested:
+            break
+        pending = None
+
+    result["last_row"] = state.last_row
+    result["timings_ms"] = _milliseconds(timings)
+    return result
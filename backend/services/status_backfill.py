@@ -0,0 +1,102 @@
+# backend/services/status_backfill.py
+import datetime
+from typing import Callable, Dict, Any, Optional
+from sqlalchemy import case, func, select, update, and_, or_
+from sqlalchemy.orm import Session
+from backend import models
+from backend.services import version_counters
+from backend.services.classifier import classifier
+from backend.services.recent_cache import recent_cache
+from backend.services.response_cache import data_version
+
+SD = models.SensorData
+
+
+def _status_expr(device_id: str):
+    """SQL CASE computing status from the current profiles. A device profile
+    applies to every row; otherwise thresholds may vary with the row's location."""
+    classifier.reload()
+    if classifier.has_device_profile(device_id):
+        warning, critical = classifier.thresholds_for(device_id)
+    else:
+        warning, critical = classifier.thresholds_for()
+        by_location = classifier.location_profiles()
+        if by_location:
+            warning = case({loc: w for loc, (w, _) in by_location.items()}, value=SD.location, else_=warning)
+            critical = case({loc: c for loc, (_, c) in by_location.items()}, value=SD.location, else_=critical)
+    return case(
+        (SD.water_level > warning, "normal"),
+        (SD.water_level > critical, "warning"),
+        else_="critical",
+    )
+
+
+def recompute_status(
+    db: Session,
+    device_id: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    chunk_size: int = 50000,
+    resume_after: Optional[datetime.datetime] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Reclassify stored readings of one device in [start, end].
+
+    Walks the (device_id, timestamp) index in chunks of `chunk_size` rows and
+    issues one set-based UPDATE per chunk, committing after each so progress
+    survives interruption. Pass the last reported `checkpoint` as
+    `resume_after` to continue. Rows whose status is already right are not
+    rewritten.
+    """
+    status_expr = _status_expr(device_id)
+
+    def bounds(lower):
+        conds = [SD.device_id == device_id]
+        if lower is not None:
+            conds.append(SD.timestamp > lower)
+        elif start is not None:
+            conds.append(SD.timestamp >= start)
+        if end is not None:
+            conds.append(SD.timestamp <= end)
+        return conds
+
+    lower = resume_after
+    total = db.execute(select(func.count()).select_from(SD).where(*bounds(lower))).scalar()
+    scanned = 0
+    changed = 0
+    while scanned < total:
+        conds = bounds(lower)
+        # timestamp closing this chunk, read from the index
+        upper = db.execute(
+            select(SD.timestamp).where(*conds).order_by(SD.timestamp)
+            .offset(min(chunk_size, total - scanned) - 1).limit(1)
+        ).scalar()
+        if upper is None:
+            break
+        window = and_(*conds, SD.timestamp <= upper)
+        result = db.execute(
+            update(SD)
+            .where(window, or_(SD.status.is_(None), SD.status != status_expr))
+            .values(status=status_expr)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        changed += result.rowcount
+        scanned += min(chunk_size, total - scanned)
+        lower = upper
+        if on_progress:
+            on_progress({"device_id": device_id, "scanned": scanned, "total": total, "changed": changed, "checkpoint": lower})
+    if changed:
+        # keep the latest-reading projection in step with the rewritten rows
+        db.execute(
+            update(models.DeviceLatest)
+            .where(models.DeviceLatest.device_id == device_id)
+            .values(status=select(SD.status).where(SD.id == models.DeviceLatest.reading_id).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+        # tells a server running in another process to drop what it cached
+        version_counters.bump(db, version_counters.READINGS)
+        db.commit()
+        recent_cache.reload_device(db, device_id)
+        data_version.bump()
+    return {"device_id": device_id, "scanned": scanned, "total": total, "changed": changed, "checkpoint": lower}
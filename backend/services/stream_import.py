@@ -0,0 +1,81 @@
+# backend/services/stream_import.py
+import csv
+import json
+import os
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+# longest accepted line; longer ones are rejected without being buffered
+MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", "65536"))
+
+# CSV header aliases, so sheet exports can be uploaded as-is
+_CSV_ALIASES = {"distance_cm": "water_level"}
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"):
+        return NDJSON
+    if ct in ("text/csv", "application/csv"):
+        return CSV
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Yield (line_number, text) from a byte stream without buffering the whole body.
+    A line longer than `max_line_bytes` is discarded as it streams in and
+    yielded as (line_number, None)."""
+    pending = b""
+    overlong = False
+    line_no = 0
+    async for chunk in chunks:
+        *lines, tail = chunk.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if overlong or len(pending) + len(raw) > max_line_bytes:
+                yield line_no, None
+            else:
+                yield line_no, (pending + raw).decode("utf-8", errors="replace").rstrip("\r")
+            pending, overlong = b"", False
+        if overlong:
+            continue
+        if len(pending) + len(tail) > max_line_bytes:
+            pending, overlong = b"", True
+        else:
+            pending += tail
+    if overlong:
+        yield line_no + 1, None
+    elif pending:
+        yield line_no + 1, pending.decode("utf-8", errors="replace").rstrip("\r")
+
+
+class RecordParser:
+    """Turns NDJSON or CSV lines into dicts for SensorDataCreate.
+    For CSV the first non-empty line is the header."""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.header: Optional[List[str]] = None
+
+    def parse(self, line: str) -> Optional[Dict[str, Any]]:
+        """Return a record, or None for lines that carry no record (blank, CSV header).
+        Raises ValueError for malformed lines."""
+        if not line.strip():
+            return None
+        if self.fmt == NDJSON:
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e.msg}")
+            if not isinstance(obj, dict):
+                raise ValueError("Expected a JSON object")
+            return obj
+        values = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [_CSV_ALIASES.get(h.strip().lower(), h.strip().lower()) for h in values]
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} columns, got {len(values)}")
+        return {k: (v if v != "" else None) for k, v in zip(self.header, values)}
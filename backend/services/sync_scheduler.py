@@ -0,0 +1,273 @@
+# backend/services/sync_scheduler.py
+import datetime
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from backend.database import SessionLocal
+from backend.services import sheet_sync
+
+# seconds between incremental syncs of each sheet; 0 syncs only when triggered
+SHEET_SYNC_INTERVAL_S = float(os.getenv("SHEET_SYNC_INTERVAL_S", "60"))
+# longest wait after repeated failures
+SHEET_SYNC_BACKOFF_MAX_S = float(os.getenv("SHEET_SYNC_BACKOFF_MAX_S", "900"))
+# Sheets API reads allowed per minute; kept below the 60/min per-user quota
+SHEETS_READS_PER_MIN = float(os.getenv("SHEETS_READS_PER_MIN", "50"))
+SHEETS_READ_BURST = int(os.getenv("SHEETS_READ_BURST", "10"))
+
+
+class TokenBucket:
+    """Blocking rate limiter: `rate` tokens per second, bursting to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.taken = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.taken += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "reads_per_min": self.rate * 60,
+                "tokens": round(self._tokens, 2),
+                "taken": self.taken,
+                "waited_s": round(self.waited, 1),
+            }
+
+
+class _Throttled:
+    """A sheets service whose API reads each take a token from the bucket first."""
+
+    def __init__(self, service, bucket: TokenBucket):
+        self._service = service
+        self._bucket = bucket
+
+    def __getattr__(self, name):
+        return getattr(self._service, name)
+
+    def read_header(self) -> List[str]:
+        self._bucket.acquire()
+        return self._service.read_header()
+
+    def read_rows(self, first_row: int, count: int, width: int) -> List[List[str]]:
+        self._bucket.acquire()
+        return self._service.read_rows(first_row, count, width)
+
+
+def _utc_now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class _Job:
+    def __init__(self, key: str, factory: Callable[[], Any], on_error: Optional[Callable[[Any], None]] = None):
+        self.key = key
+        self.factory = factory
+        self.on_error = on_error
+        self.running = False
+        self.next_run: Optional[float] = time.monotonic()
+        self.runs = 0
+        self.failures = 0
+        self.last_started: Optional[str] = None
+        self.last_finished: Optional[str] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    def status(self) -> Dict[str, Any]:
+        due = None if self.next_run is None else max(0.0, round(self.next_run - time.monotonic(), 1))
+        return {
+            "sheet": self.key,
+            "running": self.running,
+            "next_run_in_s": due,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+class SyncScheduler:
+    """Background incremental Sheets sync.
+
+    One thread runs sheet_sync.sync_sheet for each registered sheet every
+    `interval` seconds, so at most one sync per sheet is ever in flight and
+    triggers arriving meanwhile coalesce into the next run. A failed run
+    (auth, API or database error) is retried after interval * 2**failures,
+    capped at `backoff_max`. Every Sheets API read of every job takes a token
+    from a shared bucket sized below the read quota.
+    """
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        backoff_max: float = 900.0,
+        bucket: Optional[TokenBucket] = None,
+        session_factory=SessionLocal,
+    ):
+        self.interval = interval
+        self.backoff_max = backoff_max
+        self.bucket = bucket or TokenBucket(50 / 60, 10)
+        self.session_factory = session_factory
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def register(self, key: str, factory: Callable[[], Any], on_error: Optional[Callable[[Any], None]] = None):
+        """Sync the sheet returned by `factory()` (a GoogleSheetsService or the
+        mock), called for every run. After a failed run, `on_error` gets the
+        service that failed, e.g. to drop a cached client."""
+        with self._lock:
+            self._jobs[key] = _Job(key, factory, on_error)
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name="sheet-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop scheduling. A sync in progress is not interrupted; its cursor is
+        committed per page, so the next start resumes where it stopped."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def trigger(self, key: Optional[str] = None) -> Dict[str, Any]:
+        """Make one sheet (all when key is None) due now. Raises KeyError for
+        an unknown sheet or when none is registered."""
+        with self._lock:
+            if not self._jobs or (key is not None and key not in self._jobs):
+                raise KeyError(key)
+            for job in self._jobs.values():
+                if key is None or job.key == key:
+                    job.next_run = time.monotonic()
+        if not self.running:
+            self.start()
+        self._wake.set()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = [job.status() for job in self._jobs.values()]
+        return {
+            "running": self.running,
+            "interval_s": self.interval,
+            "quota": self.bucket.stats(),
+            "sheets": jobs,
+        }
+
+    def _due(self) -> Tuple[List[_Job], Optional[float]]:
+        """Jobs due now, and seconds until the next one otherwise."""
+        now = time.monotonic()
+        with self._lock:
+            due = [j for j in self._jobs.values() if j.next_run is not None and j.next_run <= now]
+            pending = [j.next_run - now for j in self._jobs.values() if j.next_run is not None and j.next_run > now]
+        return due, min(pending) if pending else None
+
+    def _run(self, job: _Job):
+        with self._lock:
+            job.running = True
+            job.runs += 1
+            job.last_started = _utc_now()
+            # a trigger arriving while this run is in progress moves it forward again
+            job.next_run = time.monotonic() + self.interval if self.interval > 0 else None
+        db = self.session_factory()
+        service = None
+        try:
+            service = job.factory()
+            result = sheet_sync.sync_sheet(db, _Throttled(service, self.bucket))
+        except Exception as e:
+            db.rollback()
+            if service is not None and job.on_error is not None:
+                job.on_error(service)
+            with self._lock:
+                job.failures += 1
+                job.last_error = f"{type(e).__name__}: {e}"
+                delay = min(self.backoff_max, max(self.interval, 1.0) * 2 ** job.failures)
+                job.next_run = time.monotonic() + delay
+            print(f"[SyncScheduler] Sync of {job.key} failed (retry in {delay:.0f}s): {e}")
+        else:
+            with self._lock:
+                job.failures = 0
+                job.last_error = None
+                job.last_result = result
+        finally:
+            db.close()
+            with self._lock:
+                job.running = False
+                job.last_finished = _utc_now()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            due, wait = self._due()
+            for job in due:
+                if self._stopping.is_set():
+                    return
+                self._run(job)
+            if not due:
+                self._wake.wait(wait)
+                self._wake.clear()
+
+
+def default_sheet() -> Optional[Tuple[str, Callable[[], Any], Callable[[Any], None]]]:
+    """register() arguments for the sheet configured by GOOGLE_CREDENTIALS,
+    SPREADSHEET_ID, SHEET_NAME and ALLOWED_DEVICE, or None without credentials.
+    The service comes from the shared registry, so runs reuse one client."""
+    creds = os.getenv("GOOGLE_CREDENTIALS", "config/credentials.json")
+    if not os.path.exists(creds) or os.path.getsize(creds) == 0:
+        return None
+    spreadsheet_id = os.getenv("SPREADSHEET_ID", None)
+    sheet_name = os.getenv("SHEET_NAME", "Sheet1")
+    allowed_device = os.getenv("ALLOWED_DEVICE", "waterlevel")
+
+    def factory():
+        from backend.services.google_sheets_service import sheets_registry
+        return sheets_registry.service(
+            credentials_file=creds, spreadsheet_id=spreadsheet_id, sheet_name=sheet_name, allowed_device=allowed_device,
+        )
+
+    def on_error(service):
+        from backend.services.google_sheets_service import sheets_registry
+        sheets_registry.discard(service)
+
+    return f"{spreadsheet_id or 'default'}:{sheet_name}", factory, on_error
+
+
+sync_scheduler = SyncScheduler(
+    interval=SHEET_SYNC_INTERVAL_S,
+    backoff_max=SHEET_SYNC_BACKOFF_MAX_S,
+    bucket=TokenBucket(SHEETS_READS_PER_MIN / 60, SHEETS_READ_BURST),
+)
@@ -0,0 +1,268 @@
+# backend/services/timestamp_parser.py
+import os
+import re
+import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import numpy as np
+
+# formats accepted from devices and sheets, in the order they are tried
+FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d")
+
+# pseudo-format for datetime.fromisoformat, which is implemented in C
+ISO = "iso"
+
+# zone whose wall time epoch timestamps (binary records, line protocol) are
+# stored in, so they key the same rows as the devices' ISO timestamps
+DEVICE_TIMEZONE = os.getenv("DEVICE_TIMEZONE", "UTC")
+_DEVICE_TZ = datetime.timezone.utc if DEVICE_TIMEZONE == "UTC" else ZoneInfo(DEVICE_TIMEZONE)
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+# latest epoch second accepted; a day short of datetime.max leaves room for any offset
+MAX_EPOCH_S = (datetime.datetime(9999, 12, 30) - datetime.datetime(1970, 1, 1)).total_seconds()
+
+# directive -> (position in datetime(...) arguments, regex group)
+_DIRECTIVES = {
+    "Y": (0, r"(\d{4})"),
+    "m": (1, r"(\d{1,2})"),
+    "d": (2, r"(\d{1,2})"),
+    "H": (3, r"(\d{1,2})"),
+    "M": (4, r"(\d{1,2})"),
+    "S": (5, r"(\d{1,2})"),
+}
+
+
+# zero-padded width of each directive, for the vectorized column parser
+_WIDTHS = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2}
+
+# columns shorter than this are parsed value by value
+VECTOR_MIN_ROWS = 64
+
+
+def _fixed_format(fmt: str, sample: str) -> Optional[str]:
+    """The zero-padded strptime format `sample` is written in, when a
+    column in `fmt` can be parsed by position; None otherwise."""
+    if fmt == ISO:
+        # fromisoformat takes many layouts; only the plain ones are fixed-width
+        if len(sample) == 19 and sample[10] in " T":
+            return "%Y-%m-%d" + sample[10] + "%H:%M:%S"
+        return "%Y-%m-%d" if len(sample) == 10 else None
+    return fmt
+
+
+def _parse_fixed(values: List[str], fmt: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse a column of zero-padded timestamps laid out exactly as `fmt`
+    with NumPy: characters are compared and combined by position over the
+    whole column. Returns (datetime64[s] values, mask of values that
+    matched and are valid dates); other values are left to the caller."""
+    n = len(values)
+    width = 0
+    fields: Dict[str, int] = {}
+    literals: List[Tuple[int, str]] = []
+    for i, part in enumerate(fmt.split("%")):
+        if i:
+            fields[part[0]] = width
+            width += _WIDTHS[part[0]]
+            part = part[1:]
+        for ch in part:
+            literals.append((width, ch))
+            width += 1
+    ok = np.fromiter(map(len, values), dtype=np.int64, count=n) == width
+    # one contiguous row of code points per character position
+    codes = np.array(values, dtype=f"<U{width}").view(np.uint32).reshape(n, width).T.astype(np.int64, order="C")
+    for offset, ch in literals:
+        ok &= codes[offset] == ord(ch)
+    parts = {}
+    for directive, offset in fields.items():
+        value = np.zeros(n, dtype=np.int64)
+        for pos in range(offset, offset + _WIDTHS[directive]):
+            digit = codes[pos] - ord("0")
+            ok &= (digit >= 0) & (digit <= 9)
+            value = value * 10 + digit
+        parts[directive] = value
+    zeros = np.zeros(n, dtype=np.int64)
+    month, day = parts.get("m", zeros + 1), parts.get("d", zeros + 1)
+    hour, minute, second = parts.get("H", zeros), parts.get("M", zeros), parts.get("S", zeros)
+    ok &= (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)
+    months = ((parts["Y"] - 1970) * 12 + np.clip(month, 1, 12) - 1).astype("datetime64[M]")
+    days = months.astype("datetime64[D]") + (day - 1)
+    ok &= days.astype("datetime64[M]") == months  # rejects e.g. 31/04
+    stamps = days.astype("datetime64[s]") + (hour * 3600 + minute * 60 + second).astype("timedelta64[s]")
+    return stamps, ok
+
+
+def _compile_format(fmt: str) -> Callable[[str], datetime.datetime]:
+    """Turn a strptime format made of %Y/%m/%d/%H/%M/%S into a regex-based parser.
+    Raises ValueError on mismatch, just like strptime."""
+    if fmt == ISO:
+        return datetime.datetime.fromisoformat
+    pattern = ""
+    positions: List[int] = []
+    for i, part in enumerate(fmt.split("%")):
+        if i == 0:
+            pattern += re.escape(part)
+            continue
+        pos, group = _DIRECTIVES[part[0]]
+        positions.append(pos)
+        pattern += group + re.escape(part[1:])
+    match = re.compile(pattern + r"\Z").match
+    # order regex groups as datetime(year, month, day, hour, minute, second)
+    order = sorted(range(len(positions)), key=positions.__getitem__)
+
+    def parse(s: str) -> datetime.datetime:
+        m = match(s)
+        if m is None:
+            raise ValueError(f"{s!r} does not match {fmt!r}")
+        groups = m.groups()
+        return datetime.datetime(*[int(groups[k]) for k in order])
+
+    return parse
+
+
+def wall_time(dt: datetime.datetime) -> datetime.datetime:
+    """Timestamps are stored as the device's naive wall time: an offset is
+    dropped, not converted."""
+    return dt.replace(tzinfo=None)
+
+
+def from_epoch(seconds: float) -> datetime.datetime:
+    """Wall time in DEVICE_TIMEZONE of `seconds` since the Unix epoch.
+    Raises ValueError before 1970 or past year 9999 (nan and inf included)."""
+    if not 0 <= seconds <= MAX_EPOCH_S:
+        raise ValueError(f"Epoch timestamp out of range: {seconds}")
+    return wall_time((_UNIX_EPOCH + datetime.timedelta(seconds=seconds)).astimezone(_DEVICE_TZ))
+
+
+def from_epoch_many(seconds: np.ndarray) -> List[datetime.datetime]:
+    """from_epoch() over a column of in-range epoch seconds."""
+    if _DEVICE_TZ is datetime.timezone.utc:
+        return seconds.astype("datetime64[s]").tolist()
+    return [from_epoch(s) for s in seconds.tolist()]
+
+
+class TimestampParser:
+    """Timestamp parser that learns which format each source uses.
+
+    A source is any key (device id, spreadsheet column...). The format that
+    last succeeded for a key is tried first; the full format list and dateutil
+    are only consulted on a miss. Results are naive wall time (see wall_time).
+    """
+
+    def __init__(self, formats: Tuple[str, ...] = (ISO,) + FORMATS, max_keys: int = 10000):
+        self._compiled = [(f, _compile_format(f)) for f in formats]
+        self._by_format = dict(self._compiled)
+        self._learned: Dict[str, str] = {}
+        self.max_keys = max_keys
+        self.hits = 0
+        self.misses = 0
+
+    def _learn(self, key: Optional[str], fmt: str):
+        if key is None:
+            return
+        if len(self._learned) >= self.max_keys and key not in self._learned:
+            self._learned.clear()
+        self._learned[key] = fmt
+
+    def _parse_slow(self, s: str, key: Optional[str]) -> Optional[datetime.datetime]:
+        self.misses += 1
+        for fmt, parse in self._compiled:
+            try:
+                dt = parse(s)
+            except ValueError:
+                continue
+            self._learn(key, fmt)
+            return wall_time(dt)
+        # fallback to dateutil for anything unusual
+        try:
+            from dateutil import parser as _p
+            return wall_time(_p.parse(s))
+        except Exception:
+            return None
+
+    def parse(self, value, key: Optional[str] = None) -> Optional[datetime.datetime]:
+        """Parse one value (text, a datetime or epoch seconds); returns None when it cannot be parsed."""
+        if isinstance(value, datetime.datetime):
+            return wall_time(value)
+        if value is None or isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            try:
+                return from_epoch(value)
+            except ValueError:
+                return None
+        s = str(value).strip()
+        if not s:
+            return None
+        fmt = self._learned.get(key) if key is not None else None
+        if fmt is not None:
+            try:
+                dt = self._by_format[fmt](s)
+                self.hits += 1
+                return wall_time(dt)
+            except ValueError:
+                pass
+        return self._parse_slow(s, key)
+
+    def _detect(self, s: str) -> Optional[str]:
+        for fmt, parse in self._compiled:
+            try:
+                parse(s)
+            except ValueError:
+                continue
+            return fmt
+        return None
+
+    def parse_many(self, values: Iterable, key: Optional[str] = None) -> List[Optional[datetime.datetime]]:
+        """Parse a whole column in one pass.
+
+        The column format is the one learned for `key`, or detected from the
+        first non-empty value. Long columns of zero-padded fixed-width
+        timestamps are parsed with NumPy in one go; otherwise the format is
+        applied with a single compiled parser. Values that miss fall back to
+        parse().
+        """
+        values = list(values)
+        out: List[Optional[datetime.datetime]] = [None] * len(values)
+        fmt = self._learned.get(key) if key is not None else None
+        if len(values) >= VECTOR_MIN_ROWS:
+            strings = [v.strip() if isinstance(v, str) else "" for v in values]
+            sample = next((v for v in strings if v), None)
+            if sample is not None and fmt is None:
+                fmt = self._detect(sample)
+                if fmt is not None:
+                    self._learn(key, fmt)
+            fixed = _fixed_format(fmt, sample) if sample is not None and fmt is not None else None
+            if fixed is not None:
+                stamps, ok = _parse_fixed(strings, fixed)
+                out = stamps.astype("datetime64[us]").astype(object).tolist()
+                for i in np.flatnonzero(~ok).tolist():
+                    out[i] = self.parse(values[i], key)
+                self.hits += int(ok.sum())
+                return out
+        fast = self._by_format[fmt] if fmt is not None else None
+        hits = 0
+        for i, v in enumerate(values):
+            if isinstance(v, str):
+                s = v.strip()
+                if not s:
+                    continue
+                if fast is None:
+                    fmt = self._detect(s)
+                    if fmt is not None:
+                        fast = self._by_format[fmt]
+                        self._learn(key, fmt)
+                if fast is not None:
+                    try:
+                        out[i] = wall_time(fast(s))
+                        hits += 1
+                        continue
+                    except ValueError:
+                        pass
+            out[i] = self.parse(v, key)
+        self.hits += hits
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "learned_keys": len(self._learned)}
+
+
+default_parser = TimestampParser()
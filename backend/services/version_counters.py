@@ -0,0 +1,35 @@
+# backend/services/version_counters.py
+from typing import Dict
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from backend import models
+
+VC = models.VersionCounter
+
+# counter names; rows are seeded by backend/migrations.py
+THRESHOLDS = "thresholds"
+# bulk rewrites of stored readings outside the ingest path (status backfill,
+# rollup rebuild), which may run in another process than the server
+READINGS = "readings"
+# every committed ingest write, so the response caches of other workers notice it
+WRITES = "writes"
+COUNTERS = (THRESHOLDS, READINGS, WRITES)
+
+
+def bump(db: Session, name: str):
+    """Increment a counter inside the caller's transaction."""
+    db.execute(update(VC).where(VC.name == name).values(value=VC.value + 1))
+
+
+def current(name: str):
+    """Scalar subquery with the counter's value, for change-detection selects."""
+    return select(VC.value).where(VC.name == name).scalar_subquery()
+
+
+def read(db: Session, name: str) -> int:
+    return db.scalar(select(VC.value).where(VC.name == name)) or 0
+
+
+def read_many(db: Session, names) -> Dict[str, int]:
+    values = dict(db.execute(select(VC.name, VC.value).where(VC.name.in_(names))).all())
+    return {name: values.get(name) or 0 for name in names}
@@ -70,10 +70,13 @@ def check_backend_status():
     except:
         return False
 
-def get_sensor_data():
-    """Lấy dữ liệu cảm biến từ backend"""
+def get_sensor_data(hours=None, limit=100):
+    """Lấy dữ liệu cảm biến từ backend (lọc theo thời gian ngay trong database)"""
+    params = {"limit": limit}
+    if hours:
+        params["start"] = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
     try:
-        response = requests.get(f"{BACKEND_URL}/sensors/data", timeout=5)
+        response = requests.get(f"{BACKEND_URL}/sensors/data", params=params, timeout=5)
         if response.status_code == 200:
             return response.json()
         return []
@@ -269,8 +272,8 @@ def show_charts():
     """Hiển thị biểu đồ"""
     st.subheader("Biểu đồ và Phân tích")
     
-    # Lấy dữ liệu
-    sensor_data = get_sensor_data()
+    # Lấy dữ liệu 24h gần nhất
+    sensor_data = get_sensor_data(hours=24, limit=5000)
     if not sensor_data:
         sensor_data = generate_mock_data()
     
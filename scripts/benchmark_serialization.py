@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compare the per-row cost of the reading list endpoints before and after the
+fast JSON path.
+
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --rows 1000 --repeat 50
+
+"orm" is the previous implementation (ORM objects validated into
+SensorDataOut by FastAPI's response_model handling); "fast" is the current
+/sensors/data route (Core tuples encoded directly). Both run against the
+same throwaway SQLite database through FastAPI's TestClient.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend import models, schemas
+from backend.database import Base
+from backend.services import fast_json
+
+
+def _seed(session_factory, rows: int):
+    db = session_factory()
+    start = datetime(2024, 1, 1)
+    db.bulk_insert_mappings(models.SensorData, [
+        {
+            "timestamp": start + timedelta(seconds=10 * i),
+            "device_id": f"device-{i % 4}",
+            "water_level": 150.0 + (i % 97) * 0.5,
+            "location": "Default Location",
+            "status": "normal",
+            "notes": None,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+    db.close()
+
+
+def _build_app(session_factory) -> FastAPI:
+    from backend.api import sensors
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    @app.get("/orm", response_model=List[schemas.SensorDataOut])
+    def orm(limit: int = 100, db: Session = Depends(get_db)):
+        return db.query(models.SensorData).order_by(models.SensorData.id.desc()).limit(limit).all()
+
+    @app.get("/fast", response_model=List[schemas.SensorDataOut])
+    def fast(limit: int = 100, db: Session = Depends(get_db)):
+        return sensors._page_readings(db, limit, None, None, None, None)
+
+    return app
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    ap.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000], help="page sizes to request")
+    ap.add_argument("--repeat", type=int, default=30, help="requests per measurement")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        _seed(session_factory, max(args.rows))
+        client = TestClient(_build_app(session_factory))
+
+        print(f"JSON encoder: {'orjson' if fast_json.ORJSON_AVAILABLE else 'stdlib json'}")
+        print(f"{'rows':>6} {'orm µs/row':>12} {'fast µs/row':>12} {'speedup':>8}")
+        for rows in args.rows:
+            per_row = {}
+            for path in ("orm", "fast"):
+                assert client.get(f"/{path}", params={"limit": rows}).status_code == 200  # warm up
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    client.get(f"/{path}", params={"limit": rows})
+                per_row[path] = (time.perf_counter() - t0) / args.repeat / rows * 1e6
+            print(f"{rows:>6} {per_row['orm']:>12.2f} {per_row['fast']:>12.2f} {per_row['orm'] / per_row['fast']:>7.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
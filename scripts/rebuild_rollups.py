@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Rebuild the 1-minute / 1-hour / 1-day reading rollups from sensor_data.
+
+    python scripts/rebuild_rollups.py
+    python scripts/rebuild_rollups.py --device waterlevel --start 2024-01-01 --end 2024-01-31
+
+The ingest path keeps rollups current; run this after loading readings by
+other means (raw SQL, restores). The range is widened to whole days.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.database import SessionLocal, engine, Base
+from backend import models  # noqa: F401  (registers tables)
+from backend.services import rollup_service
+from backend.services.timestamp_parser import default_parser
+
+
+def _parse_time(value):
+    parsed = default_parser.parse(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Unsupported timestamp: {value}")
+    return parsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild reading rollups")
+    ap.add_argument("--device", help="only this device_id")
+    ap.add_argument("--start", type=_parse_time, help="first day to rebuild")
+    ap.add_argument("--end", type=_parse_time, help="last day to rebuild")
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        t0 = time.time()
+        written = rollup_service.rebuild(db, device_id=args.device, start=args.start, end=args.end)
+        print(f"✅ Rebuilt rollups in {time.time() - t0:.1f}s: " + ", ".join(f"{r}={n}" for r, n in written.items()))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Recompute stored SensorData.status for a device after its thresholds change.
+
+    python scripts/recompute_status.py --device waterlevel
+    python scripts/recompute_status.py --device waterlevel --start 2024-01-01 --end 2024-12-31
+
+Progress is checkpointed to a JSON file after every chunk; re-running the
+same command resumes where it stopped. Use --restart to ignore the checkpoint.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.database import SessionLocal
+from backend.services.status_backfill import recompute_status
+from backend.services.timestamp_parser import default_parser
+
+
+def _parse_time(value):
+    if value is None:
+        return None
+    parsed = default_parser.parse(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Unsupported timestamp: {value}")
+    return parsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recompute sensor status for a device/time range")
+    ap.add_argument("--device", required=True, help="device_id to reclassify")
+    ap.add_argument("--start", type=_parse_time, help="first timestamp (inclusive)")
+    ap.add_argument("--end", type=_parse_time, help="last timestamp (inclusive)")
+    ap.add_argument("--chunk-size", type=int, default=50000, help="rows per UPDATE/commit")
+    ap.add_argument("--checkpoint", help="checkpoint file (default: .recompute_<device>.json)")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = ap.parse_args()
+
+    checkpoint_file = args.checkpoint or f".recompute_{args.device}.json"
+    job = {"device": args.device, "start": str(args.start), "end": str(args.end)}
+    resume_after = None
+    if os.path.exists(checkpoint_file) and not args.restart:
+        with open(checkpoint_file) as f:
+            saved = json.load(f)
+        if saved.get("job") == job and saved.get("checkpoint"):
+            resume_after = _parse_time(saved["checkpoint"])
+            print(f"↪️  Resuming after {resume_after}")
+
+    def on_progress(p):
+        with open(checkpoint_file, "w") as f:
+            json.dump({"job": job, "checkpoint": p["checkpoint"].isoformat()}, f)
+        print(f"   {p['scanned']}/{p['total']} rows scanned, {p['changed']} changed (up to {p['checkpoint']})")
+
+    print(f"🔁 Recomputing status for {args.device}...")
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = recompute_status(
+            db, args.device, start=args.start, end=args.end,
+            chunk_size=args.chunk_size, resume_after=resume_after, on_progress=on_progress,
+        )
+    finally:
+        db.close()
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s: {result['changed']} of {result['scanned']} rows changed")
+
+
+if __name__ == "__main__":
+    main()
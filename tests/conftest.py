@@ -0,0 +1,27 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# point the app at a throwaway SQLite file before backend.database is imported
+_DB_DIR = tempfile.mkdtemp(prefix="flood-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+
+import pytest
+from backend.main import app  # noqa: F401  creates the tables
+from backend.database import Base, SessionLocal, engine
+from backend.migrations import run_migrations
+from backend.services.replay_filter import replay_filter
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        run_migrations(engine)  # reseed version counters
+        replay_filter.clear()  # it remembers ids of the rows just deleted
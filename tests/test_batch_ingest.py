@@ -0,0 +1,30 @@
+# tests/test_batch_ingest.py
+import datetime
+from fastapi.testclient import TestClient
+from backend import schemas
+from backend.main import app
+from backend.services.timestamp_parser import default_parser
+
+
+def test_batch_mixes_aware_and_naive_timestamps(db):
+    items = [
+        {"device_id": "tz", "timestamp": "2024-01-01T10:00:00+07:00", "water_level": 100},
+        {"device_id": "tz", "timestamp": "2024-01-01 11:00:00", "water_level": 120},
+        {"device_id": "tz", "timestamp": "2024-01-01T11:00:00", "water_level": 130},
+    ]
+    with TestClient(app) as client:
+        r = client.post("/sensors/batch", json=items)
+        assert r.status_code == 200, r.text
+        assert r.json()["inserted"] == 2 and r.json()["rejected"] == 0
+        latest = client.get("/sensors/latest", params={"device_id": "tz"})
+        assert latest.status_code == 200
+        assert latest.json()["water_level"] == 130
+
+
+def test_offsets_are_dropped_once_at_the_boundary():
+    aware = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone(datetime.timedelta(hours=7)))
+    for value in ("2024-01-01T10:00:00+07:00", aware):
+        reading = schemas.SensorDataCreate.model_validate({"device_id": "tz", "timestamp": value, "water_level": 1})
+        assert reading.timestamp == datetime.datetime(2024, 1, 1, 10)
+    column = ["2024-01-01T10:00:00+07:00"] * 100
+    assert set(default_parser.parse_many(column, key="tz-column")) == {datetime.datetime(2024, 1, 1, 10)}
@@ -0,0 +1,49 @@
+# tests/test_binary_ingest.py
+from zoneinfo import ZoneInfo
+import pytest
+from fastapi.testclient import TestClient
+from backend import models
+from backend.api import sensors
+from backend.main import app
+from backend.services import binary_protocol, timestamp_parser
+
+
+def _payload(n):
+    return binary_protocol.pack_records([("bin", 1704067200 + i, 100.0 + i) for i in range(n)])
+
+
+def test_binary_ingest_within_limit(db, monkeypatch):
+    monkeypatch.setattr(sensors, "MAX_BATCH_SIZE", 4)
+    with TestClient(app) as client:
+        r = client.post("/sensors/binary", content=_payload(4), headers={"Content-Type": binary_protocol.CONTENT_TYPE})
+    assert r.status_code == 200 and r.json()["inserted"] == 4
+
+
+def test_binary_ingest_rejects_oversized_body(db, monkeypatch):
+    monkeypatch.setattr(sensors, "MAX_BATCH_SIZE", 4)
+    with TestClient(app) as client:
+        r = client.post("/sensors/binary", content=_payload(5))
+        assert r.status_code == 413
+        # chunked upload without Content-Length: rejected while streaming
+        r = client.post("/sensors/binary", content=iter([_payload(3), _payload(3)]))
+        assert r.status_code == 413
+
+
+def test_binary_and_json_readings_share_a_row(db, monkeypatch):
+    monkeypatch.setattr(timestamp_parser, "_DEVICE_TZ", ZoneInfo("Asia/Bangkok"))
+    with TestClient(app) as client:
+        # 2024-01-01 00:00 UTC is 07:00 on the device's clock
+        r = client.post("/sensors/binary", content=binary_protocol.pack_records([("tzdev", 1704067200, 100.0)]))
+        assert r.json()["inserted"] == 1
+        r = client.post("/sensors/batch", json=[
+            {"device_id": "tzdev", "timestamp": "2024-01-01T07:00:00+07:00", "water_level": 110},
+            {"device_id": "tzdev", "timestamp": 1704067200, "water_level": 120},
+        ])
+        assert r.json()["inserted"] == 0 and r.json()["updated"] == 1
+    assert db.query(models.SensorData).filter_by(device_id="tzdev").count() == 1
+
+
+def test_pack_records_rejects_long_device_ids():
+    assert len(binary_protocol.pack_records([("x" * 16, 0, 1.0)])) == binary_protocol.RECORD_SIZE
+    with pytest.raises(ValueError):
+        binary_protocol.pack_records([("x" * 17, 0, 1.0)])
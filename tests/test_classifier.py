@@ -0,0 +1,30 @@
+# tests/test_classifier.py
+from fastapi.testclient import TestClient
+from backend import models
+from backend.database import SessionLocal
+from backend.main import app
+from backend.services import version_counters
+from backend.services.classifier import StatusClassifier, classifier
+
+
+def test_put_twice_within_a_second_uses_latest_thresholds(db):
+    with TestClient(app) as client:
+        assert client.put("/thresholds/", json={"device_id": "b", "warning_cm": 50, "critical_cm": 20}).status_code == 200
+        assert classifier.classify(40, "b") == "warning"
+        assert client.put("/thresholds/", json={"device_id": "b", "warning_cm": 30, "critical_cm": 10}).status_code == 200
+    assert classifier.classify(40, "b") == "normal"
+
+
+def test_poll_sees_write_from_another_process_in_same_second(db):
+    watcher = StatusClassifier(session_factory=SessionLocal, reload_interval=0)
+    db.add(models.ThresholdProfile(device_id="c", warning_cm=50, critical_cm=20))
+    version_counters.bump(db, version_counters.THRESHOLDS)
+    db.commit()
+    assert watcher.classify(40, "c") == "warning"
+
+    # same row count and (on SQLite) the same updated_at second: only the counter moves
+    profile = db.query(models.ThresholdProfile).filter_by(device_id="c").one()
+    profile.warning_cm, profile.critical_cm = 30, 10
+    version_counters.bump(db, version_counters.THRESHOLDS)
+    db.commit()
+    assert watcher.classify(40, "c") == "normal"
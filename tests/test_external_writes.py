@@ -0,0 +1,39 @@
+# tests/test_external_writes.py
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+from backend import models
+from backend.main import app
+from backend.services.response_cache import data_version
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_recompute_status_cli_is_seen_by_running_server(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(data_version, "poll_interval", 0)
+    readings = [
+        {"timestamp": f"2024-01-01T00:00:{i:02d}", "device_id": "rs", "water_level": 40}
+        for i in range(3)
+    ]
+    with TestClient(app) as client:
+        assert client.post("/sensors/batch", json=readings).json()["inserted"] == 3
+        recent = client.get("/sensors/recent", params={"device_id": "rs"}).json()
+        assert recent["source"] == "cache" and {p["status"] for p in recent["points"]} == {"warning"}
+        data = client.get("/sensors/data", params={"device_id": "rs"})
+        etag = data.headers["etag"]
+
+        # new thresholds, then the CLI rewrites the statuses in its own process
+        db.add(models.ThresholdProfile(device_id="rs", warning_cm=30, critical_cm=10))
+        db.commit()
+        subprocess.run(
+            [sys.executable, "scripts/recompute_status.py", "--device", "rs",
+             "--checkpoint", str(tmp_path / "ck.json")],
+            cwd=ROOT, check=True, capture_output=True,
+        )
+
+        recent = client.get("/sensors/recent", params={"device_id": "rs"}).json()
+        assert {p["status"] for p in recent["points"]} == {"normal"}
+        data = client.get("/sensors/data", params={"device_id": "rs"}, headers={"If-None-Match": etag})
+        assert data.status_code == 200
+        assert {r["status"] for r in data.json()} == {"normal"}
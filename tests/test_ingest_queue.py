@@ -0,0 +1,47 @@
+# tests/test_ingest_queue.py
+import datetime
+from backend import models
+from backend.database import SessionLocal
+from backend.services import ingest_service
+from backend.services.ingest_queue import IngestQueue
+
+
+def _readings(n):
+    t0 = datetime.datetime(2024, 1, 1)
+    return [
+        {"timestamp": t0 + datetime.timedelta(seconds=i), "device_id": "q", "water_level": 100.0}
+        for i in range(n)
+    ]
+
+
+def test_failed_batch_is_retried(db, monkeypatch):
+    real = ingest_service.bulk_upsert
+    calls = []
+
+    def flaky(session, batch):
+        calls.append(len(batch))
+        if len(calls) <= 2:
+            raise RuntimeError("database is locked")
+        return real(session, batch)
+
+    monkeypatch.setattr(ingest_service, "bulk_upsert", flaky)
+    q = IngestQueue(max_retries=3, retry_delay=0.01, session_factory=SessionLocal)
+    q._write(_readings(5))
+
+    assert calls == [5, 5, 5]
+    assert q.stats()["written"] == 5 and q.stats()["failed"] == 0 and q.stats()["retries"] == 2
+    assert db.query(models.SensorData).filter_by(device_id="q").count() == 5
+
+
+def test_batch_dropped_after_retries_is_logged(monkeypatch, capsys):
+    def broken(session, batch):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(ingest_service, "bulk_upsert", broken)
+    q = IngestQueue(max_retries=2, retry_delay=0.01, session_factory=SessionLocal)
+    q._write(_readings(2))
+
+    assert q.stats()["failed"] == 2 and q.stats()["retries"] == 2
+    out = capsys.readouterr().out
+    assert "Dropped batch of 2 after 3 attempts" in out
+    assert "q@2024-01-01 00:00:01" in out
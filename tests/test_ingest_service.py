@@ -0,0 +1,56 @@
+# tests/test_ingest_service.py
+import datetime
+from backend import models
+from backend.services import ingest_service, sheet_sync
+from backend.services.mock_google_sheets import MockGoogleSheetsService
+
+TS = datetime.datetime(2024, 1, 1, 10)
+
+
+def _reading(level, ts=TS, **extra):
+    return {"device_id": "up", "timestamp": ts, "water_level": level, **extra}
+
+
+def test_upsert_conflicts_update_the_existing_row(db):
+    first = ingest_service.upsert_one(db, _reading(100.0, location="Bridge", notes="install"))
+    again = ingest_service.upsert_one(db, _reading(120.0))
+    assert again.id == first.id
+    rows = db.query(models.SensorData).filter_by(device_id="up").all()
+    assert len(rows) == 1
+    # optional columns the update does not carry keep their stored values
+    assert (rows[0].water_level, rows[0].location, rows[0].notes) == (120.0, "Bridge", "install")
+
+    counts = ingest_service.bulk_upsert(db, [_reading(130.0), _reading(50.0, ts=TS + datetime.timedelta(minutes=1))])
+    assert counts == {"inserted": 1, "updated": 1, "replayed": 0}
+    db.expire_all()
+    assert [r.water_level for r in db.query(models.SensorData).order_by(models.SensorData.timestamp)] == [130.0, 50.0]
+    assert db.get(models.DeviceLatest, "up").water_level == 50.0
+
+
+def test_diff_readings_classifies_and_keeps_only_changes(db):
+    minute = datetime.timedelta(minutes=1)
+    ingest_service.bulk_upsert(db, [_reading(100.0), _reading(110.0, ts=TS + minute), _reading(120.0, ts=TS + 2 * minute)])
+    incoming = [
+        _reading(100.0),                                   # unchanged
+        _reading(111.0, ts=TS + minute),                   # new value
+        _reading(120.0, ts=TS + 2 * minute, notes="wet"),  # new optional column
+        _reading(130.0, ts=TS + 3 * minute),               # not stored yet
+    ]
+    rows, counts = ingest_service.diff_readings(db, incoming)
+    assert counts == {"inserted": 1, "updated": 2, "unchanged": 1}
+    assert [r["timestamp"] for r in rows] == [TS + minute, TS + 2 * minute, TS + 3 * minute]
+
+    ingest_service.write_rows(db, incoming, rows)
+    _, counts = ingest_service.diff_readings(db, incoming)
+    assert counts == {"inserted": 0, "updated": 0, "unchanged": 4}
+
+
+def test_sheet_sync_reports_counts_and_timings(db):
+    sheet = MockGoogleSheetsService(spreadsheet_id="timed")
+    result = sheet_sync.sync_sheet(db, sheet)
+    assert result["inserted"] + result["updated"] + result["unchanged"] == result["total_from_sheet"] > 0
+    assert set(result["timings_ms"]) == {"fetch", "parse", "diff", "write"}
+    assert all(ms >= 0 for ms in result["timings_ms"].values())
+
+    again = sheet_sync.sync_sheet(db, sheet)
+    assert (again["inserted"], again["updated"]) == (0, 0)
@@ -0,0 +1,89 @@
+# tests/test_line_listener.py
+import asyncio
+import datetime
+from zoneinfo import ZoneInfo
+from backend.services import line_listener as ll, timestamp_parser
+
+
+class _Queue:
+    def __init__(self):
+        self.readings = []
+
+    def submit_many(self, readings):
+        self.readings.extend(readings)
+        return len(readings)
+
+
+def test_parse_lines_rejects_out_of_range_epochs():
+    readings, rejected = ll.parse_lines(
+        b"a 1704067200 120\nb inf 5\nc 1e20 5\nd nan 5\ne -1 5\nf 2024-01-01T00:00:10 121\n"
+    )
+    assert rejected == 4
+    assert [r["device_id"] for r in readings] == ["a", "f"]
+    assert readings[0]["timestamp"] == datetime.datetime(2024, 1, 1)
+
+
+def test_tcp_and_udp_clients(monkeypatch):
+    queue = _Queue()
+    monkeypatch.setattr(ll, "ingest_queue", queue)
+    listener = ll.LineProtocolListener(host="127.0.0.1", tcp_port=0, udp_port=0)
+
+    async def scenario():
+        await listener.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", listener.tcp_port)
+            writer.write(b"t1 1704067200 120\nt2 1e20 5\nt3 1704067201 ")
+            await writer.drain()
+            writer.write(b"121\nt4 1704067202 122")  # last line has no newline
+            writer.write_eof()
+            await reader.read()  # server closes after the stream ends
+            writer.close()
+
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol, remote_addr=("127.0.0.1", listener.udp_port)
+            )
+            transport.sendto(b"u1 inf 5\nu2 1704067203 123\n")
+            for _ in range(50):
+                if any(r["device_id"] == "u2" for r in queue.readings):
+                    break
+                await asyncio.sleep(0.01)
+            transport.close()
+        finally:
+            await listener.stop()
+
+    asyncio.run(scenario())
+    assert [r["device_id"] for r in queue.readings] == ["t1", "t3", "t4", "u2"]
+    assert listener.accepted == 4 and listener.rejected == 2
+
+
+def test_epoch_and_iso_timestamps_agree(monkeypatch):
+    monkeypatch.setattr(timestamp_parser, "_DEVICE_TZ", ZoneInfo("Asia/Bangkok"))
+    epoch = ll.parse_line("d 1704067200 10")["timestamp"]
+    iso = ll.parse_line("d 2024-01-01T07:00:00+07:00 10")["timestamp"]
+    assert epoch == iso == datetime.datetime(2024, 1, 1, 7)
+
+
+def test_overlong_tcp_line_is_skipped_up_to_its_newline(monkeypatch):
+    queue = _Queue()
+    monkeypatch.setattr(ll, "ingest_queue", queue)
+    listener = ll.LineProtocolListener(host="127.0.0.1", tcp_port=0)
+
+    async def scenario():
+        await listener.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", listener.tcp_port)
+            writer.write(b"a 1704067200 1\nlong" + b"x" * (ll.MAX_LINE_BYTES + 10))
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            # the tail of the overlong line would parse as a reading of device "x"
+            writer.write(b"x 1704067201 5\nb 1704067202 2\n")
+            writer.write_eof()
+            await reader.read()
+            writer.close()
+        finally:
+            await listener.stop()
+
+    asyncio.run(scenario())
+    assert [r["device_id"] for r in queue.readings] == ["a", "b"]
+    assert listener.rejected == 1
@@ -0,0 +1,43 @@
+# tests/test_migrations.py
+import datetime
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from backend.database import Base
+from backend.migrations import SENSOR_KEY_INDEX, check_dialect, run_migrations
+
+
+def test_duplicates_collapse_to_the_newest_row_before_the_key_is_added(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    Base.metadata.create_all(engine)
+    insert = text("INSERT INTO sensor_data (id, device_id, timestamp, water_level) VALUES (:id, :d, :ts, :wl)")
+    ts = datetime.datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        # a database from before the unique key
+        conn.execute(text(f"DROP INDEX {SENSOR_KEY_INDEX}"))
+        conn.execute(insert, [
+            {"id": 1, "d": "a", "ts": ts, "wl": 1.0},
+            {"id": 2, "d": "a", "ts": ts, "wl": 2.0},
+            {"id": 3, "d": "b", "ts": ts, "wl": 3.0},
+            {"id": 4, "d": "a", "ts": ts, "wl": 4.0},
+            {"id": 5, "d": "a", "ts": ts + datetime.timedelta(minutes=1), "wl": 5.0},
+        ])
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, water_level FROM sensor_data ORDER BY id")).all()
+        assert rows == [(3, 3.0), (4, 4.0), (5, 5.0)]
+        latest = conn.execute(text("SELECT device_id, reading_id FROM device_latest ORDER BY device_id")).all()
+        assert latest == [("a", 5), ("b", 3)]
+    assert SENSOR_KEY_INDEX in {ix["name"] for ix in inspect(engine).get_indexes("sensor_data")}
+    with pytest.raises(IntegrityError), engine.begin() as conn:
+        conn.execute(insert, {"id": 6, "d": "b", "ts": ts, "wl": 6.0})
+    engine.dispose()
+
+
+def test_unsupported_dialects_are_refused():
+    check_dialect(SimpleNamespace(dialect=SimpleNamespace(name="postgresql")))
+    with pytest.raises(RuntimeError, match="mysql"):
+        check_dialect(SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
@@ -0,0 +1,74 @@
+# tests/test_reading_query.py
+import base64
+import datetime
+import json
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.services import ingest_service, reading_query
+
+T = datetime.datetime(2024, 1, 1, 12)
+
+
+@pytest.fixture
+def readings(db):
+    # five devices report at the same instant, plus one earlier and one later reading
+    batch = [{"device_id": f"d{i}", "timestamp": T, "water_level": 100.0 + i} for i in range(5)]
+    batch += [
+        {"device_id": "d0", "timestamp": T - datetime.timedelta(minutes=1), "water_level": 90.0},
+        {"device_id": "d0", "timestamp": T + datetime.timedelta(minutes=1), "water_level": 95.0},
+    ]
+    ingest_service.bulk_upsert(db, batch)
+    return batch
+
+
+def _pages(client, **params):
+    seen, cursor = [], None
+    while True:
+        r = client.get("/sensors/data", params={**params, "limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        seen += r.json()
+        cursor = r.headers.get("x-next-cursor")
+        if cursor is None:
+            return seen
+
+
+def test_ts_mode_pages_through_timestamp_ties(readings):
+    with TestClient(app) as client:
+        rows = _pages(client, start="2024-01-01T00:00:00")
+    keys = [(r["timestamp"], r["id"]) for r in rows]
+    assert len(keys) == len(set(keys)) == len(readings)
+    assert keys == sorted(keys, reverse=True)
+    assert [r["timestamp"] for r in rows].count(T.isoformat()) == 5
+
+
+def test_id_mode_pages_newest_id_first(readings):
+    with TestClient(app) as client:
+        ids = [r["id"] for r in _pages(client)]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == len(readings)
+
+
+def test_cursor_round_trip():
+    cursor = reading_query.encode_cursor(reading_query.TS_MODE, 42, T)
+    assert "=" not in cursor
+    assert reading_query.decode_cursor(cursor) == (reading_query.TS_MODE, 42, T)
+    assert reading_query.decode_cursor(reading_query.encode_cursor(reading_query.ID_MODE, 7)) == ("id", 7, None)
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor!",
+    _raw_cursor({"m": "ts", "id": 1, "ts": "yesterday"}),
+    _raw_cursor({"m": "ts", "id": "one", "ts": T.isoformat()}),
+    _raw_cursor({"m": "xx", "id": 1}),
+    _raw_cursor([1, 2]),
+])
+def test_invalid_cursor_is_a_400(db, cursor):
+    with pytest.raises(reading_query.InvalidCursor):
+        reading_query.decode_cursor(cursor)
+    with TestClient(app) as client:
+        r = client.get("/sensors/data", params={"cursor": cursor})
+    assert r.status_code == 400 and r.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,53 @@
+# tests/test_recent_cache.py
+import datetime
+from backend.services.recent_cache import DeviceRing, RecentCache, to_epoch
+
+
+def _contents(ring):
+    ts, level, status = ring.window(None, None, None)
+    return list(zip(ts[::-1].tolist(), level[::-1].tolist(), status[::-1].tolist()))
+
+
+def test_out_of_order_readings_are_spliced_in_order():
+    ring = DeviceRing(4)
+    for ts, level in ((10, 1.0), (30, 3.0), (20, 2.0)):
+        ring.add(ts, level, 0)
+    ring.add(20, 2.5, 1)  # resend: updated in place
+    assert _contents(ring) == [(10, 1.0, 0), (20, 2.5, 1), (30, 3.0, 0)]
+    assert ring.complete
+
+    ring.add(40, 4.0, 0)
+    ring.add(50, 5.0, 0)  # full: the oldest reading falls out
+    assert [t for t, _, _ in _contents(ring)] == [20, 30, 40, 50]
+    assert not ring.complete
+
+    ring.add(5, 0.5, 0)  # older than everything buffered: ignored
+    ring.add(25, 2.7, 2)  # spliced in, pushing out the oldest
+    assert _contents(ring) == [(25, 2.7, 2), (30, 3.0, 0), (40, 4.0, 0), (50, 5.0, 0)]
+
+
+def test_covers_decides_between_cache_and_db():
+    ring = DeviceRing(3)
+    ring.add(10, 1.0, 0)
+    assert ring.covers(None) and ring.covers(0)  # holds the whole history
+    for ts in (20, 30, 40):
+        ring.add(ts, 1.0, 0)
+    assert not ring.covers(None)
+    assert not ring.covers(19)
+    assert ring.covers(20) and ring.covers(35)
+
+
+def test_query_falls_back_when_the_window_predates_the_ring(db):
+    cache = RecentCache(capacity=3)
+    cache.load(db)
+    t0 = datetime.datetime(2024, 1, 1)
+    minutes = [t0 + datetime.timedelta(minutes=i) for i in range(5)]
+    cache.record([{"device_id": "rc", "timestamp": t, "water_level": float(i), "status": "normal"} for i, t in enumerate(minutes)])
+
+    assert [p["water_level"] for p in cache.query("rc", since=minutes[2])] == [4.0, 3.0, 2.0]
+    assert cache.query("rc", since=minutes[1]) is None
+    assert cache.query("rc") is None
+    # "newest N" needs no `since` once the ring yields N rows
+    assert [p["timestamp"] for p in cache.query("rc", limit=2)] == [minutes[4], minutes[3]]
+    assert cache.query("rc", until=minutes[3], limit=3) is None
+    assert to_epoch(minutes[0]) == 1704067200.0
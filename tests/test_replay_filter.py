@@ -0,0 +1,45 @@
+# tests/test_replay_filter.py
+import datetime
+from backend.services import ingest_service, replay_filter as rf
+from backend.services.replay_filter import ReplayFilter, replay_filter
+
+TS = datetime.datetime(2024, 1, 1)
+
+
+def _reading(level, minute=0, **extra):
+    return {"device_id": "rp", "timestamp": TS + datetime.timedelta(minutes=minute), "water_level": level, **extra}
+
+
+def test_filter_drops_only_identical_resends(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rf.time, "monotonic", lambda: now[0])
+    f = ReplayFilter(per_device=2, window_s=60)
+    f.remember([_reading(1.0), _reading(2.0, minute=1)], [10, 11])
+
+    batch = [_reading(1.0), _reading(2.5, minute=1), _reading(1.0, notes="x"), _reading(3.0, minute=2)]
+    assert f.filter(batch) == batch[1:]
+    assert (f.hits, f.misses) == (1, 3)
+
+    f.remember([_reading(3.0, minute=2)])  # per_device=2 evicts the oldest key
+    assert f.replay_id(_reading(1.0)) is None
+    assert f.replay_id(_reading(2.0, minute=1)) == 11
+
+    now[0] += 61  # past the window
+    assert f.replay_id(_reading(2.0, minute=1)) is None
+
+
+def test_upsert_one_counts_only_skipped_writes(db, monkeypatch):
+    first = ingest_service.upsert_one(db, _reading(5.0))
+    before = (replay_filter.hits, replay_filter.misses)
+    assert ingest_service.upsert_one(db, _reading(5.0)).id == first.id
+    assert (replay_filter.hits, replay_filter.misses) == (before[0] + 1, before[1])
+
+    # bulk writes do not record row ids, so a resend through upsert_one is written again
+    ingest_service.bulk_upsert(db, [_reading(6.0, minute=1)])
+    before = (replay_filter.hits, replay_filter.misses)
+    writes = []
+    after_commit = ingest_service._after_commit
+    monkeypatch.setattr(ingest_service, "_after_commit", lambda *a: (writes.append(a), after_commit(*a)))
+    ingest_service.upsert_one(db, _reading(6.0, minute=1))
+    assert len(writes) == 1
+    assert (replay_filter.hits, replay_filter.misses) == (before[0], before[1] + 1)
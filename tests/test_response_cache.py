@@ -0,0 +1,35 @@
+# tests/test_response_cache.py
+import datetime
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.services import ingest_service, response_cache
+
+
+def test_etag_from_another_process_does_not_match(db, monkeypatch):
+    with TestClient(app) as client:
+        first = client.get("/sensors/latest/all")
+        etag = first.headers["etag"]
+        assert client.get("/sensors/latest/all", headers={"If-None-Match": etag}).status_code == 304
+
+        # a restarted server or another worker has a different id
+        monkeypatch.setattr(response_cache, "_BOOT_ID", "restarted")
+        again = client.get("/sensors/latest/all", headers={"If-None-Match": etag})
+        assert again.status_code == 200
+        assert again.headers["etag"] != etag
+
+
+def test_write_from_another_worker_invalidates_the_cache(db, monkeypatch):
+    monkeypatch.setattr(response_cache.data_version, "poll_interval", 0)
+    with TestClient(app) as client:
+        assert client.get("/sensors/latest/all").json() == []
+        etag = client.get("/sensors/latest/all").headers["etag"]
+
+        # another worker's write: committed, but none of this process's hooks run
+        monkeypatch.setattr(ingest_service, "_after_commit", lambda *a, **kw: None)
+        ingest_service.bulk_upsert(db, [
+            {"device_id": "w2", "timestamp": datetime.datetime(2024, 1, 1), "water_level": 100.0},
+        ])
+
+        r = client.get("/sensors/latest/all", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert [d["device_id"] for d in r.json()] == ["w2"]
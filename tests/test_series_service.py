@@ -0,0 +1,38 @@
+# tests/test_series_service.py
+import numpy as np
+from backend.services.series_service import lttb
+
+
+def _check(idx, size, n):
+    assert len(idx) == n and idx[0] == 0 and idx[-1] == size - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_both_extremes_in_one_bucket():
+    x = np.arange(100, dtype=np.float64)
+    y = np.full(100, 5.0)
+    y[50], y[51] = 9, 1
+    idx = lttb(x, y, 20)
+    _check(idx, 100, 20)
+    assert 50 in idx and 51 in idx
+
+    y[50], y[51] = 1, 9
+    idx = lttb(x, y, 20)
+    _check(idx, 100, 20)
+    assert 50 in idx and 51 in idx
+
+
+def test_lttb_extremes_in_last_bucket():
+    x = np.arange(100, dtype=np.float64)
+    y = np.full(100, 5.0)
+    y[97], y[98] = 1, 9
+    idx = lttb(x, y, 10)
+    _check(idx, 100, 10)
+    assert 97 in idx and 98 in idx
+
+
+def test_lttb_prefers_the_flood_peak_without_room():
+    x = np.arange(10, dtype=np.float64)
+    y = np.full(10, 5.0)
+    y[4], y[5] = 9, 1
+    assert list(lttb(x, y, 3)) == [0, 5, 9]
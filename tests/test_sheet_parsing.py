@@ -0,0 +1,79 @@
+# tests/test_sheet_parsing.py
+import datetime
+import random
+import numpy as np
+from backend.services.classifier import classifier
+from backend.services.google_sheets_service import parse_columns, parse_rows
+from backend.services.timestamp_parser import TimestampParser, _parse_fixed
+
+
+def _old_parse_rows(header, rows, allowed_device=None):
+    """The per-row parser parse_columns replaced, as a reference."""
+    parser = TimestampParser()
+    hdr = {h.strip().lower(): i for i, h in enumerate(header)}
+    if not all(k in hdr for k in ("timestamp", "device_id", "distance_cm")):
+        return []
+    out = []
+    for row in rows:
+        cell = lambda name: row[hdr[name]] if len(row) > hdr[name] else ""
+        ts = parser.parse(cell("timestamp"), key="old")
+        dist = cell("distance_cm")
+        try:
+            level = float(dist) if dist.strip() != "" else None
+        except ValueError:
+            continue
+        device = cell("device_id").strip()
+        if ts is None or level is None:
+            continue
+        if allowed_device and device.lower() != allowed_device.lower():
+            continue
+        out.append({"timestamp": ts, "device_id": device, "water_level": level,
+                    "status": classifier.classify(level, device)})
+    return out
+
+
+def _junk_rows(n, seed=7):
+    rng = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        ts = (base + datetime.timedelta(minutes=i)).strftime("%d/%m/%Y %H:%M:%S")
+        device = rng.choice(["waterlevel", "WaterLevel", "other", " waterlevel "])
+        dist = f"{rng.uniform(10, 400):.1f}"
+        kind = rng.random()
+        if kind < 0.05:
+            ts = rng.choice(["", "not a date", "31/04/2024 10:00:00", "1/2/2024 3:04:05"])
+        elif kind < 0.1:
+            dist = rng.choice(["", "abc", " 12.5 "])
+        row = ["x", dist, device, ts]
+        if kind > 0.95:
+            row = row[:2]  # the API trims trailing empty cells
+        rows.append(row)
+    return rows
+
+
+def test_parse_rows_matches_the_per_row_parser():
+    header = ["note", "Distance_cm", "device_id", " Timestamp "]
+    rows = _junk_rows(3000)
+    for allowed in (None, "waterlevel"):
+        assert parse_rows(header, rows, allowed, "new") == _old_parse_rows(header, rows, allowed)
+    assert parse_rows(["timestamp", "device_id"], rows) == []
+    cols = parse_columns(header, rows[:10], None, "new")
+    assert isinstance(cols["water_level"], np.ndarray) and len(cols["timestamp"]) == len(cols["status"])
+
+
+def test_parse_fixed_matches_strptime():
+    fmt = "%d/%m/%Y %H:%M:%S"
+    values = ["01/02/2024 03:04:05", "31/04/2024 10:00:00", "29/02/2023 00:00:00", "29/02/2024 23:59:59",
+              "1/2/2024 3:04:05", "01/13/2024 00:00:00", "01-02-2024 03:04:05", "01/02/2024 24:00:00", ""]
+    stamps, ok = _parse_fixed(values, fmt)
+    for value, stamp, good in zip(values, stamps.astype("datetime64[s]").tolist(), ok.tolist()):
+        try:
+            expected = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            expected = None
+        # strptime accepts unpadded fields, which the fixed-width path leaves to the fallback
+        if expected is not None and len(value) != 19:
+            assert not good
+            continue
+        assert (stamp if good else None) == expected, value
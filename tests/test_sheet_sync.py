@@ -0,0 +1,97 @@
+# tests/test_sheet_sync.py
+import datetime
+from backend import models
+from backend.services import sheet_sync
+
+HEADER = ["timestamp", "device_id", "distance_cm", "location"]
+
+
+class FakeSheet:
+    sheet_key = "fake"
+    sheet_name = "Sheet1"
+    allowed_device = None
+    timestamp_key = "sheet:fake:Sheet1:timestamp"
+
+    def __init__(self, n):
+        self.rows = []
+        self.reads = []
+        self.appended = 0
+        self.append(n)
+
+    def append(self, n):
+        start, self.appended = self.appended, self.appended + n
+        for i in range(start, self.appended):
+            ts = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i)
+            self.rows.append([ts.strftime("%Y-%m-%d %H:%M:%S"), "sheet-dev", str(100 + i), "Bridge"])
+
+    def read_header(self):
+        return list(HEADER)
+
+    def read_rows(self, first_row, count, width):
+        self.reads.append((first_row, count))
+        return [r[:width] for r in self.rows[first_row - 2:first_row - 2 + count]]
+
+
+def _stored(db):
+    db.expire_all()
+    return db.query(models.SensorData).filter_by(device_id="sheet-dev").count()
+
+
+def test_appended_rows_are_synced_incrementally(db):
+    sheet = FakeSheet(10)
+    first = sheet_sync.sync_sheet(db, sheet)
+    assert (first["mode"], first["inserted"], first["last_row"]) == ("initial", 10, 11)
+
+    sheet.append(3)
+    sheet.reads.clear()
+    second = sheet_sync.sync_sheet(db, sheet)
+    assert second["mode"] == "incremental"
+    assert (second["inserted"], second["updated"], second["rows_fetched"], second["last_row"]) == (3, 0, 3, 14)
+    # the last SHEET_VERIFY_ROWS processed rows are re-read along with the new ones
+    assert sheet.reads[0][0] == 11 - sheet_sync.SHEET_VERIFY_ROWS + 1
+    assert set(second["timings_ms"]) == {"fetch", "parse", "diff", "write"}
+
+    third = sheet_sync.sync_sheet(db, sheet)
+    assert (third["mode"], third["inserted"], third["rows_fetched"]) == ("incremental", 0, 0)
+    assert _stored(db) == 13
+
+
+def test_edit_inside_the_verify_window_forces_a_rescan(db):
+    sheet = FakeSheet(10)
+    sheet_sync.sync_sheet(db, sheet)
+    sheet.rows[-2][2] = "42"
+    result = sheet_sync.sync_sheet(db, sheet)
+    assert result["mode"] == "full"
+    assert (result["inserted"], result["updated"], result["unchanged"]) == (0, 1, 9)
+    assert sheet_sync.get_state(db, "fake", "Sheet1").full_scans == 1
+    edited = db.query(models.SensorData).filter_by(device_id="sheet-dev", water_level=42).count()
+    assert edited == 1
+
+
+def test_deleted_row_forces_a_rescan(db):
+    sheet = FakeSheet(10)
+    sheet_sync.sync_sheet(db, sheet)
+    del sheet.rows[3]
+    result = sheet_sync.sync_sheet(db, sheet)
+    assert result["mode"] == "full"
+    assert (result["rows_fetched"], result["inserted"], result["unchanged"], result["last_row"]) == (9, 0, 9, 10)
+
+    # the cursor now matches the shorter sheet
+    sheet.append(1)
+    after = sheet_sync.sync_sheet(db, sheet)
+    assert (after["mode"], after["inserted"], after["last_row"]) == ("incremental", 1, 11)
+
+
+def test_limit_and_paging(db):
+    sheet = FakeSheet(10)
+    first = sheet_sync.sync_sheet(db, sheet, limit=6, page_size=4)
+    assert (first["pages"], first["rows_fetched"], first["last_row"]) == (2, 6, 7)
+    assert sheet.reads == [(2, 4), (6, 2)]
+    assert _stored(db) == 6
+
+    # resumes at the cursor: the verify read carries the first page of new rows
+    sheet.reads.clear()
+    rest = sheet_sync.sync_sheet(db, sheet, page_size=4)
+    assert (rest["mode"], rest["inserted"], rest["last_row"]) == ("incremental", 4, 11)
+    assert sheet.reads == [(7 - sheet_sync.SHEET_VERIFY_ROWS + 1, sheet_sync.SHEET_VERIFY_ROWS + 4), (12, 4)]
+    assert _stored(db) == 10
@@ -0,0 +1,70 @@
+# tests/test_stats_service.py
+import datetime
+import random
+import pytest
+from backend import models
+from backend.services import ingest_service, stats_service
+
+T0 = datetime.datetime(2024, 1, 1)
+
+
+def _old_stats(db, limit):
+    """The in-memory computation compute_stats replaced, as a reference."""
+    items = db.query(models.SensorData).order_by(models.SensorData.id.desc()).limit(limit).all()
+    if not items:
+        return {"total_readings": 0, "average_water_level": 0, "max_water_level": 0, "min_water_level": 0, "devices": []}
+    levels = [i.water_level for i in items]
+    return {
+        "total_readings": len(items),
+        "average_water_level": sum(levels) / len(levels),
+        "max_water_level": max(levels),
+        "min_water_level": min(levels),
+        "devices": sorted({i.device_id for i in items}),
+    }
+
+
+@pytest.fixture
+def readings(db):
+    rng = random.Random(3)
+    batch = [
+        {
+            "device_id": f"s{i % 3}",
+            "location": f"zone{i % 2}",
+            "timestamp": T0 + datetime.timedelta(minutes=7 * i),
+            "water_level": round(rng.uniform(10, 400), 1),
+        }
+        for i in range(200)
+    ]
+    ingest_service.bulk_upsert(db, batch)
+    return batch
+
+
+def test_matches_the_in_memory_stats(db, readings):
+    assert stats_service.compute_stats(db, limit=1000) == pytest.approx(_old_stats(db, 1000))
+    assert stats_service.compute_stats(db, limit=50) == pytest.approx(_old_stats(db, 50))
+
+
+def test_empty(db):
+    assert stats_service.compute_stats(db) == _old_stats(db, 1000)
+
+
+def test_windows_breakdowns_and_buckets(db, readings):
+    start, end = T0 + datetime.timedelta(hours=2), T0 + datetime.timedelta(hours=10)
+    window = [r for r in readings if start <= r["timestamp"] <= end and r["device_id"] == "s1"]
+    out = stats_service.compute_stats(db, device_id="s1", start=start, end=end, group_by="location", granularity="hour")
+    levels = [r["water_level"] for r in window]
+    assert out["total_readings"] == len(window)
+    assert out["average_water_level"] == pytest.approx(sum(levels) / len(levels))
+    assert (out["min_water_level"], out["max_water_level"]) == (min(levels), max(levels))
+
+    by_zone = {}
+    for r in window:
+        by_zone.setdefault(r["location"], []).append(r["water_level"])
+    assert [(b["key"], b["count"]) for b in out["breakdown"]] == [(k, len(v)) for k, v in sorted(by_zone.items())]
+
+    by_hour = {}
+    for r in window:
+        by_hour.setdefault((r["timestamp"].replace(minute=0), r["location"]), []).append(r["water_level"])
+    assert [(s["bucket"], s["key"], s["count"], s["max_water_level"]) for s in out["series"]] == [
+        (hour, zone, len(v), max(v)) for (hour, zone), v in sorted(by_hour.items())
+    ]
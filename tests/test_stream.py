@@ -0,0 +1,30 @@
+# tests/test_stream.py
+import asyncio
+import datetime
+import json
+from backend.api import sensors
+from backend.database import engine
+from backend.services import ingest_service
+from backend.services.broadcaster import broadcaster
+
+
+def test_stream_releases_its_connection_after_the_snapshot(db):
+    ingest_service.bulk_upsert(db, [
+        {"device_id": "s1", "timestamp": datetime.datetime(2024, 1, 1), "water_level": 100.0},
+    ])
+    db.close()
+    subscribers = broadcaster.stats()["subscribers"]
+
+    async def scenario():
+        response = await sensors.stream_readings(None, device_id=["s1"])
+        # nothing pinned while the stream stays open
+        assert engine.pool.checkedout() == 0
+        first = await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()
+        return first
+
+    frame = asyncio.run(scenario()).decode()
+    assert frame.startswith("event: snapshot")
+    data = json.loads(frame.split("data: ", 1)[1])
+    assert [r["device_id"] for r in data] == ["s1"]
+    assert broadcaster.stats()["subscribers"] == subscribers
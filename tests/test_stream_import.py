@@ -0,0 +1,47 @@
+# tests/test_stream_import.py
+import asyncio
+from backend.services import stream_import
+
+
+def _lines(chunks, max_line_bytes=16):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [item async for item in stream_import.iter_lines(source(), max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks():
+    assert _lines([b"ab", b"c\nde", b"f\r\n", b"gh"]) == [(1, "abc"), (2, "def"), (3, "gh")]
+
+
+def test_overlong_line_is_rejected_not_buffered():
+    # 40 bytes with no newline spread over many chunks, then a normal line
+    chunks = [b"x" * 8] * 5 + [b"y\nok\n"]
+    assert _lines(chunks) == [(1, None), (2, "ok")]
+
+
+def test_overlong_line_within_one_chunk_and_at_end():
+    assert _lines([b"short\n" + b"z" * 17 + b"\nnext\n" + b"w" * 20]) == [
+        (1, "short"), (2, None), (3, "next"), (4, None),
+    ]
+
+
+def test_import_reports_overlong_line(monkeypatch, db):
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    monkeypatch.setattr(stream_import, "MAX_LINE_BYTES", 200)
+    body = (
+        b'{"timestamp": "2024-01-01T00:00:00", "device_id": "imp", "water_level": 120}\n'
+        + b'{"notes": "' + b"n" * 500 + b'"}\n'
+        + b'{"timestamp": "2024-01-01T00:00:10", "device_id": "imp", "water_level": 121}\n'
+    )
+    with TestClient(app) as client:
+        r = client.post("/sensors/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+    out = r.json()
+    assert out["inserted"] == 2 and out["rejected"] == 1
+    assert out["errors"] == [{"line": 2, "error": "Line longer than 200 bytes"}]
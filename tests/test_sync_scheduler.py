@@ -0,0 +1,130 @@
+# tests/test_sync_scheduler.py
+import threading
+import time
+import pytest
+from backend.services import sync_scheduler as ss
+from backend.services.mock_google_sheets import MockGoogleSheetsService
+
+
+def _wait(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class _BlockingSheet(MockGoogleSheetsService):
+    """Mock sheet whose reads wait for `gate`, counting reads in flight."""
+
+    def __init__(self):
+        super().__init__(spreadsheet_id="blocking")
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def read_rows(self, first_row, count, width):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.entered.set()
+        self.gate.wait(5)
+        try:
+            return super().read_rows(first_row, count, width)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_single_flight_and_trigger_coalescing(db):
+    sheet = _BlockingSheet()
+    sched = ss.SyncScheduler(interval=0, bucket=ss.TokenBucket(1000, 1000))
+    sched.register("s", lambda: sheet)
+    try:
+        sched.start()
+        assert sheet.entered.wait(5)
+        for _ in range(5):
+            sched.trigger("s")
+        job = sched._jobs["s"]
+        assert job.running and job.runs == 1
+
+        sheet.gate.set()
+        _wait(lambda: job.runs == 2 and not job.running)
+        time.sleep(0.1)
+    finally:
+        sched.stop()
+    # five triggers during the first run collapse into one more run
+    assert job.runs == 2 and job.next_run is None
+    assert job.failures == 0 and job.last_result["mode"] == "incremental"
+    assert sheet.max_in_flight == 1
+
+
+def test_failures_back_off_exponentially_up_to_the_cap(db):
+    def factory():
+        raise RuntimeError("auth failed")
+
+    sched = ss.SyncScheduler(interval=10, backoff_max=35)
+    sched.register("s", factory)
+    job = sched._jobs["s"]
+    for failures, delay in ((1, 20), (2, 35), (3, 35)):
+        sched._run(job)
+        assert job.failures == failures
+        assert job.next_run - time.monotonic() == pytest.approx(delay, abs=0.5)
+    assert job.last_error == "RuntimeError: auth failed"
+
+
+def test_failed_sync_hands_the_service_to_on_error_and_success_resets(db):
+    broken = MockGoogleSheetsService(spreadsheet_id="broken")
+    broken.read_rows = lambda *a: (_ for _ in ()).throw(ConnectionError("quota"))
+    services = [broken, MockGoogleSheetsService(spreadsheet_id="ok")]
+    discarded = []
+    sched = ss.SyncScheduler(interval=10, bucket=ss.TokenBucket(1000, 1000))
+    sched.register("s", lambda: services.pop(0), on_error=discarded.append)
+    job = sched._jobs["s"]
+
+    sched._run(job)
+    assert discarded == [broken] and job.failures == 1
+
+    sched._run(job)
+    assert job.failures == 0 and job.last_error is None
+    assert job.next_run - time.monotonic() == pytest.approx(10, abs=0.5)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_rate_and_burst(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ss, "time", clock)
+    bucket = ss.TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 100.0  # the burst is free
+
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == pytest.approx(102.0)  # then 2 per second
+    assert bucket.stats()["taken"] == 7 and bucket.stats()["waited_s"] == 2.0
+
+    clock.now += 60
+    assert bucket.stats()["tokens"] == 3  # refills only up to the burst
+
+
+def test_every_sheet_read_takes_a_token(db):
+    bucket = ss.TokenBucket(1000, 1000)
+    sched = ss.SyncScheduler(interval=10, bucket=bucket)
+    sched.register("s", lambda: MockGoogleSheetsService(spreadsheet_id="counted"))
+    job = sched._jobs["s"]
+    sched._run(job)
+    assert job.failures == 0
+    # one header read plus one read per page
+    assert bucket.taken == 1 + job.last_result["pages"]
@@ -0,0 +1,54 @@
+# tests/test_timestamp_parser.py
+import datetime
+from dateutil import parser as dateutil_parser
+from backend.services.timestamp_parser import TimestampParser
+
+OLD_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d")
+
+VALUES = [
+    # naive
+    "2024-01-02 03:04:05", "2024-01-02T03:04:05", "02/01/2024 03:04:05", "02-01-2024 03:04:05",
+    "2024-01-02", "2/1/2024 3:04:05", "2024-01-02 03:04:05.250", " 2024-01-02 03:04:05 ", "Jan 2 2024 03:04",
+    # with an offset
+    "2024-01-02T03:04:05Z", "2024-01-02T03:04:05+07:00", "2024-01-02 03:04:05-0530",
+    # malformed
+    "", "   ", "garbage", "31/04/2024 10:00:00", "2024-13-01 00:00:00", "02/01/2024 25:00:00",
+]
+
+
+def _old_parse(value):
+    """The strptime-then-dateutil parser TimestampParser replaced, as a reference.
+    Offsets are dropped, as every ingest path now does."""
+    s = str(value).strip()
+    if not s:
+        return None
+    for fmt in OLD_FORMATS:
+        try:
+            return datetime.datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    try:
+        return dateutil_parser.parse(s).replace(tzinfo=None)
+    except Exception:
+        return None
+
+
+def test_parse_matches_the_old_parser():
+    parser = TimestampParser()
+    for key in (None, "device:a"):
+        for value in VALUES:
+            assert parser.parse(value, key=key) == _old_parse(value), value
+    # a learned format does not hide values written another way
+    parser.parse("02/01/2024 03:04:05", key="device:b")
+    assert parser.parse("2024-01-02T03:04:05+07:00", key="device:b") == datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+
+def test_parse_many_matches_the_old_parser():
+    parser = TimestampParser()
+    base = datetime.datetime(2024, 1, 1)
+    for fmt in OLD_FORMATS:
+        # long enough for the vectorized path, with malformed and odd values mixed in
+        column = [(base + datetime.timedelta(hours=7 * i)).strftime(fmt) for i in range(100)]
+        column[10:10] = VALUES
+        assert parser.parse_many(column, key=f"col:{fmt}") == [_old_parse(v) for v in column], fmt
+    assert parser.parse_many(VALUES) == [_old_parse(v) for v in VALUES]